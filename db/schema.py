@@ -12,7 +12,8 @@ SCHEMA_QUERIES = [
         low DOUBLE,
         close DOUBLE,
         volume LONG
-    ) timestamp(timestamp) PARTITION BY DAY;
+    ) timestamp(timestamp) PARTITION BY DAY WAL
+    DEDUP UPSERT KEYS(timestamp, symbol);
     """,
     
     """
@@ -35,6 +36,28 @@ SCHEMA_QUERIES = [
         predicted_return DOUBLE,
         actual_return DOUBLE,
         confidence_score DOUBLE
+    ) timestamp(timestamp) PARTITION BY DAY WAL
+    DEDUP UPSERT KEYS(timestamp, symbol);
+    """,
+    
+    """
+    CREATE TABLE IF NOT EXISTS stock_rankings (
+        timestamp TIMESTAMP,
+        symbol SYMBOL INDEX,
+        rank INT,
+        predicted_return DOUBLE,
+        technical_score DOUBLE,
+        sentiment_score DOUBLE,
+        overall_score DOUBLE,
+        close DOUBLE,
+        volume DOUBLE,
+        SMA_20 DOUBLE,
+        SMA_50 DOUBLE,
+        SMA_200 DOUBLE,
+        RSI DOUBLE,
+        Volatility DOUBLE,
+        avg_volume_20 DOUBLE,
+        volume_ratio DOUBLE
     ) timestamp(timestamp) PARTITION BY DAY;
     """
 ]
\ No newline at end of file
@@ -0,0 +1,108 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db_pool import ConnectionPool
+from src.ingestion import BulkIngestor
+
+TABLE = 'ingestion_benchmark'
+
+def make_frame(rows: int, symbols: int) -> pd.DataFrame:
+    """Synthetic yfinance-shaped OHLCV frame spread over the given number of symbols"""
+    rng = np.random.default_rng(42)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, rows))
+    index = pd.date_range('2000-01-01', periods=rows, freq='min')
+    return pd.DataFrame({
+        'Symbol': [f"SYM{i % symbols}" for i in range(rows)],
+        'Open': close,
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': rng.integers(1_000, 1_000_000, rows)
+    }, index=index)
+
+def insert_row_by_row(conn, df: pd.DataFrame):
+    """The original store_data_postgres loop, kept as the baseline"""
+    cursor = conn.cursor()
+    for index, row in df.iterrows():
+        cursor.execute(f"""
+        INSERT INTO {TABLE} (timestamp, symbol, open, high, low, close, volume)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (
+            index.strftime('%Y-%m-%d %H:%M:%S'), row['Symbol'], float(row['Open']),
+            float(row['High']), float(row['Low']), float(row['Close']), int(row['Volume'])
+        ))
+    cursor.close()
+
+def reset_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(f"""
+    CREATE TABLE {TABLE} (
+        timestamp TIMESTAMP,
+        symbol SYMBOL,
+        open DOUBLE,
+        high DOUBLE,
+        low DOUBLE,
+        close DOUBLE,
+        volume LONG
+    ) timestamp(timestamp) PARTITION BY DAY;
+    """)
+    cursor.close()
+
+def benchmark(host, port, ilp_port, rows, symbols, batch_rows):
+    pool = ConnectionPool(host, port, maxconn=2)
+    df = make_frame(rows, symbols)
+    ingestor = BulkIngestor(pool, host=host, ilp_port=ilp_port, batch_rows=batch_rows)
+
+    def row_by_row():
+        with pool.connection() as conn:
+            insert_row_by_row(conn, df)
+
+    def reset():
+        with pool.connection() as conn:
+            reset_table(conn)
+
+    paths = [
+        ('row-by-row INSERT', row_by_row),
+        ('execute_values', lambda: ingestor.write_history(df, TABLE, mode='pg')),
+        ('ILP sender', lambda: ingestor.write_history(df, TABLE, mode='ilp')),
+    ]
+
+    print(f"Ingesting {rows} rows across {symbols} symbols (batch_rows={batch_rows})")
+    print(f"{'path':<20} {'seconds':>10} {'rows/s':>12}")
+    for name, run in paths:
+        reset()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<20} {elapsed:>10.2f} {rows / elapsed:>12,.0f}")
+
+    reset()
+    ingestor.close()
+    pool.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description="Benchmark StockDataCollector ingestion paths")
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--batch-rows', type=int, default=10_000)
+    args = parser.parse_args()
+
+    benchmark(
+        os.getenv('QUESTDB_HOST', 'questdb'),
+        int(os.getenv('QUESTDB_PORT', '8812')),
+        int(os.getenv('QUESTDB_ILP_PORT', '9009')),
+        args.rows,
+        args.symbols,
+        args.batch_rows
+    )
@@ -0,0 +1,62 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.stock_analyzer import StockAnalyzer
+
+def benchmark(db_host, db_port, worker_counts, chunk_size, repeat):
+    """Time a full ranking of every stored symbol for each worker count"""
+    probe = StockAnalyzer(db_host=db_host, db_port=db_port)
+    symbols = probe.loader.get_symbols()
+    probe.pool.close()
+
+    print(f"Ranking {len(symbols)} symbols, best of {repeat} runs")
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8} {'ranked':>8}")
+
+    baseline = None
+    for workers in worker_counts:
+        # No model cache: the warm-up and repeated runs would otherwise only measure cache hits
+        analyzer = StockAnalyzer(
+            db_host=db_host, db_port=db_port, workers=workers, chunk_size=chunk_size, model_cache_size=0
+        )
+        # Warm-up run so process spawn and DB connect are not counted
+        analyzer.analyze_symbols(symbols[:workers * chunk_size])
+
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = analyzer.rank(analyzer.analyze_symbols(symbols))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        analyzer.close()
+        analyzer.pool.close()
+
+        baseline = baseline or best
+        print(f"{workers:>8} {best:>10.2f} {baseline / best:>7.2f}x {len(results):>8}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description="Benchmark parallel StockAnalyzer scaling")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= args.max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != args.max_workers:
+        worker_counts.append(args.max_workers)
+
+    benchmark(
+        os.getenv('QUESTDB_HOST', 'questdb'),
+        int(os.getenv('QUESTDB_PORT', '8812')),
+        worker_counts,
+        args.chunk_size,
+        args.repeat
+    )
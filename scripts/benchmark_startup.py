@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load on first use, not when the app is imported
+HEAVY_MODULES = ['pandas', 'sklearn', 'textblob', 'yfinance', 'questdb.ingress']
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def import_time(module: str, repeat: int) -> Dict:
+    """Seconds to import module in a fresh interpreter, and which heavy modules it pulled in"""
+    times, loaded = [], []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, stderr=subprocess.DEVNULL
+        )
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        times.append(result['seconds'])
+        loaded = result['loaded']
+    return {'best_s': min(times), 'median_s': statistics.median(times), 'runs': repeat, 'heavy_modules_loaded': loaded}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def cold_start(repeat: int, prewarm: bool, timeout: float) -> Dict:
+    """Seconds from launching uvicorn to the first successful /health response"""
+    times: List[float] = []
+    for _ in range(repeat):
+        port = free_port()
+        env = dict(os.environ, API_PREWARM='true' if prewarm else 'false')
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'src.api_server:app', '--port', str(port), '--log-level', 'warning'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"No /health response within {timeout}s")
+                if server.poll() is not None:
+                    raise RuntimeError(f"Server exited with status {server.returncode}")
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                        if response.status == 200:
+                            break
+                except OSError:
+                    time.sleep(0.01)
+            times.append(time.perf_counter() - start)
+        finally:
+            server.terminate()
+            server.wait()
+    return {'best_s': min(times), 'median_s': statistics.median(times), 'runs': repeat, 'prewarm': prewarm}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure API import time and cold start to the first response")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=60, help="Seconds to wait for the server to answer")
+    parser.add_argument('--prewarm', action='store_true', help="Start the server with API_PREWARM=true")
+    parser.add_argument('--skip-server', action='store_true', help="Only measure imports")
+    parser.add_argument('--max-import-ms', type=float, help="Exit non-zero if importing the app takes longer")
+    args = parser.parse_args()
+
+    report = {'imports': {
+        module: import_time(module, args.repeat)
+        for module in ['src.api_server', 'src.stock_data_collector', 'src.stock_analyzer']
+    }}
+    if not args.skip_server:
+        report['cold_start'] = cold_start(args.repeat, args.prewarm, args.timeout)
+    print(json.dumps(report, indent=2))
+
+    app_import = report['imports']['src.api_server']
+    if app_import['heavy_modules_loaded']:
+        print(f"src.api_server imports {', '.join(app_import['heavy_modules_loaded'])} eagerly", file=sys.stderr)
+        sys.exit(1)
+    if args.max_import_ms is not None and app_import['median_s'] * 1000 > args.max_import_ms:
+        print(f"Importing src.api_server took {app_import['median_s'] * 1000:.0f}ms "
+              f"(budget {args.max_import_ms:.0f}ms)", file=sys.stderr)
+        sys.exit(1)
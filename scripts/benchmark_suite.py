@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.model_registry import ModelRegistry
+from src.sentiment import SentimentScorer
+from src.stock_analyzer import StockAnalyzer
+from src.synthetic_data import InMemoryDataLoader, generate_history, generate_news, to_yfinance_frame
+
+def measure(run: Callable, repeat: int, setup: Optional[Callable] = None) -> Dict:
+    """Best and mean wall-clock seconds of run(setup()) over repeat runs; setup is not timed"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        run(arg)
+        times.append(time.perf_counter() - start)
+    return {'best_s': min(times), 'mean_s': float(np.mean(times)), 'runs': repeat}
+
+def copy_history(loader: InMemoryDataLoader) -> Dict:
+    return {symbol: frame.copy() for symbol, frame in loader.history.items()}
+
+def benchmark_stages(loader: InMemoryDataLoader, repeat: int, sample: int, questdb: bool) -> Dict:
+    """Micro-benchmarks of each analysis stage against the in-memory data"""
+    analyzer = StockAnalyzer(loader=loader)
+    symbols = loader.get_symbols()
+    sampled = symbols[:sample]
+    headlines = [item for frame in loader.news.values() for item in frame.to_dict('records')]
+
+    def reset_models(_=None):
+        analyzer.model_registry = ModelRegistry(max_entries=max(256, len(symbols)))
+
+    def predict(_):
+        for symbol in sampled:
+            analyzer.predict_stock_performance(symbol)
+
+    stages = {
+        'calculate_technical_indicators': measure(
+            lambda history: [analyzer.calculate_technical_indicators(df) for df in history.values()],
+            repeat, lambda: copy_history(loader)
+        ),
+        'calculate_technical_indicators_batch': measure(
+            analyzer.calculate_technical_indicators_batch, repeat, lambda: copy_history(loader)
+        ),
+        'sentiment_score_batch_cold': measure(
+            lambda scorer: scorer.score_batch(headlines), repeat, SentimentScorer
+        ),
+        'predict_stock_performance_cold': measure(predict, repeat, reset_models),
+        'predict_stock_performance_warm': measure(predict, repeat),
+        'get_top_stocks_cold': measure(lambda _: analyzer.get_top_stocks(10), repeat, reset_models),
+        'get_top_stocks_warm': measure(lambda _: analyzer.get_top_stocks(10), repeat)
+    }
+    stages['predict_stock_performance_cold']['symbols'] = len(sampled)
+    stages['predict_stock_performance_warm']['symbols'] = len(sampled)
+    stages['sentiment_score_batch_cold']['items'] = len(headlines)
+    if questdb:
+        stages['store_data_postgres'] = benchmark_store(loader, repeat)
+    return stages
+
+def benchmark_store(loader: InMemoryDataLoader, repeat: int) -> Dict:
+    """store_data_postgres into a scratch table; needs a running QuestDB"""
+    from src.db_pool import ConnectionPool
+    from src.stock_data_collector import StockDataCollector
+
+    table = 'benchmark_suite_history'
+    host = os.getenv('QUESTDB_HOST', 'questdb')
+    pool = ConnectionPool(host, int(os.getenv('QUESTDB_PORT', '8812')), maxconn=2)
+    collector = StockDataCollector(db_host=host, db_port=pool.port, pool=pool)
+    frame = to_yfinance_frame(next(iter(loader.history.values())))
+
+    def reset_table():
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(f"""
+            CREATE TABLE {table} (
+                timestamp TIMESTAMP, symbol SYMBOL, open DOUBLE, high DOUBLE,
+                low DOUBLE, close DOUBLE, volume LONG
+            ) timestamp(timestamp) PARTITION BY DAY;
+            """)
+            cursor.close()
+
+    try:
+        result = measure(lambda _: collector.store_data_postgres(frame, table), repeat, reset_table)
+        result['rows'] = len(frame)
+        with pool.connection() as conn:
+            conn.cursor().execute(f"DROP TABLE IF EXISTS {table}")
+        return result
+    finally:
+        collector.ingestor.close()
+        pool.close()
+
+def percentiles(latencies: List[float]) -> Dict:
+    millis = np.array(latencies) * 1000
+    return {
+        'p50_ms': float(np.percentile(millis, 50)),
+        'p95_ms': float(np.percentile(millis, 95)),
+        'p99_ms': float(np.percentile(millis, 99)),
+        'max_ms': float(millis.max())
+    }
+
+async def load_test(app, paths: List[str], concurrency: int) -> Dict:
+    """Drive the ASGI app in-process with concurrency clients until every path has been requested"""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+        # The first request pays for the snapshot/model warm-up; report it separately
+        start = time.perf_counter()
+        await client.get(paths[0])
+        first_request_ms = (time.perf_counter() - start) * 1000
+
+        pending = iter(paths)
+        latencies, errors = [], 0
+
+        async def worker():
+            nonlocal errors
+            for path in pending:
+                sent = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - sent)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    result = {
+        'requests': len(latencies),
+        'errors': errors,
+        'concurrency': concurrency,
+        'first_request_ms': first_request_ms,
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed
+    }
+    result.update(percentiles(latencies))
+    return result
+
+def benchmark_api(loader: InMemoryDataLoader, requests: int, concurrency: int, seed: int) -> Dict:
+    """Load test /api/top-stocks and /api/stock/{symbol} against the in-memory data"""
+    # Configure the app before it builds its module-level components
+    os.environ.setdefault('RANKING_REFRESH_INTERVAL', '0')
+    os.chdir(ROOT)
+    from src import api_server
+
+    api_server.analyzer.loader = loader
+    rng = np.random.default_rng(seed)
+    symbols = loader.get_symbols()
+    scenarios = {
+        'top_stocks': ['/api/top-stocks'] * requests,
+        'stock_detail': [f"/api/stock/{symbols[i]}" for i in rng.integers(0, len(symbols), requests)]
+    }
+    try:
+        return {
+            name: asyncio.run(load_test(api_server.app, paths, concurrency))
+            for name, paths in scenarios.items()
+        }
+    finally:
+        api_server.analysis_executor.shutdown(wait=False)
+        api_server.jobs.shutdown()
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description="Benchmark analysis stages and API endpoints on synthetic data")
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--days', type=int, default=500)
+    parser.add_argument('--news-per-symbol', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--sample', type=int, default=10, help="Symbols timed by predict_stock_performance")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per load-test scenario")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--skip-api', action='store_true')
+    parser.add_argument('--questdb', action='store_true', help="Also time store_data_postgres against QuestDB")
+    parser.add_argument('--output', help="Write the JSON report to this file as well")
+    args = parser.parse_args()
+
+    history = generate_history(args.symbols, args.days, seed=args.seed)
+    loader = InMemoryDataLoader(history, generate_news(history, args.news_per_symbol, seed=args.seed))
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'generated_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'params': vars(args)
+        },
+        'stages': benchmark_stages(loader, args.repeat, args.sample, args.questdb)
+    }
+    if not args.skip_api:
+        report['api'] = benchmark_api(loader, args.requests, args.concurrency, args.seed)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
@@ -3,22 +3,24 @@ import logging
 import sys
 import os
 import time
-import psycopg2
 
-def wait_for_questdb(host='questdb', port=8812, max_attempts=30):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db_pool import ConnectionPool
+from src.feature_names import RESULT_FEATURES
+
+# Tables whose rows are keyed by (timestamp, symbol), so re-collected bars and backtest reruns upsert
+DEDUP_TABLES = ['stock_historical_data', 'algorithm_performance']
+
+def wait_for_questdb(host='questdb', port=8812, max_attempts=30, pool=None):
     """Wait for QuestDB to be ready"""
+    pool = pool or ConnectionPool(host, port, minconn=0, maxconn=1)
     attempt = 0
     while attempt < max_attempts:
         try:
-            # Try to connect using psycopg2
-            conn = psycopg2.connect(
-                dbname='qdb',
-                user='admin',
-                password='quest',
-                host=host,
-                port=port
-            )
-            conn.close()
+            # Check out (and health-check) a pooled connection
+            with pool.connection():
+                pass
             logging.info("Successfully connected to QuestDB")
             return True
         except Exception as e:
@@ -32,67 +34,17 @@ def wait_for_questdb(host='questdb', port=8812, max_attempts=30):
 def init_database(host='questdb', port=8812):
     """Initialize QuestDB with required tables"""
     try:
+        pool = ConnectionPool(host, port, minconn=0, maxconn=1)
+
         # Wait for QuestDB to be ready
-        wait_for_questdb(host, port)
-        
-        # Connect using psycopg2 for DDL operations
-        conn = psycopg2.connect(
-            dbname='qdb',
-            user='admin',
-            password='quest',
-            host=host,
-            port=port
-        )
-        conn.autocommit = True
-        cursor = conn.cursor()
+        wait_for_questdb(host, port, pool=pool)
         
-        # Define schema queries
-        schema_queries = [
-            """
-            CREATE TABLE IF NOT EXISTS stock_historical_data (
-                timestamp TIMESTAMP,
-                symbol SYMBOL,
-                open DOUBLE,
-                high DOUBLE,
-                low DOUBLE,
-                close DOUBLE,
-                volume LONG
-            ) timestamp(timestamp) PARTITION BY DAY;
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS stock_news (
-                timestamp TIMESTAMP,
-                symbol SYMBOL,
-                title STRING,
-                description STRING,
-                source STRING,
-                sentiment DOUBLE
-            ) timestamp(timestamp) PARTITION BY DAY;
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS algorithm_performance (
-                timestamp TIMESTAMP,
-                symbol SYMBOL,
-                predicted_direction INT,
-                actual_direction INT,
-                predicted_return DOUBLE,
-                actual_return DOUBLE,
-                confidence_score DOUBLE
-            ) timestamp(timestamp) PARTITION BY DAY;
-            """
-        ]
-
-        # Execute schema creation queries
-        for query in schema_queries:
-            try:
-                cursor.execute(query)
-                logging.info(f"Executed query successfully: {query[:50]}...")
-            except Exception as e:
-                logging.error(f"Error executing query: {query[:50]}... Error: {e}")
-                raise
-
-        cursor.close()
-        conn.close()
+        # Pooled connections run in autocommit mode, as DDL needs
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            create_schema(cursor)
+            cursor.close()
+        pool.close()
         logging.info("Database initialization completed successfully")
         return True
 
@@ -100,6 +52,145 @@ def init_database(host='questdb', port=8812):
         logging.error(f"Failed to initialize database: {e}")
         return False
 
+def create_schema(cursor):
+    """Create the required tables"""
+    # Define schema queries
+    schema_queries = [
+        """
+        CREATE TABLE IF NOT EXISTS stock_historical_data (
+            timestamp TIMESTAMP,
+            symbol SYMBOL,
+            open DOUBLE,
+            high DOUBLE,
+            low DOUBLE,
+            close DOUBLE,
+            volume LONG
+        ) timestamp(timestamp) PARTITION BY DAY WAL
+        DEDUP UPSERT KEYS(timestamp, symbol);
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS stock_news (
+            timestamp TIMESTAMP,
+            symbol SYMBOL,
+            title STRING,
+            description STRING,
+            source STRING,
+            sentiment DOUBLE
+        ) timestamp(timestamp) PARTITION BY DAY;
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS algorithm_performance (
+            timestamp TIMESTAMP,
+            symbol SYMBOL,
+            predicted_direction INT,
+            actual_direction INT,
+            predicted_return DOUBLE,
+            actual_return DOUBLE,
+            confidence_score DOUBLE
+        ) timestamp(timestamp) PARTITION BY DAY WAL
+        DEDUP UPSERT KEYS(timestamp, symbol);
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS stock_rankings (
+            timestamp TIMESTAMP,
+            symbol SYMBOL,
+            rank INT,
+            predicted_return DOUBLE,
+            technical_score DOUBLE,
+            sentiment_score DOUBLE,
+            overall_score DOUBLE,
+            close DOUBLE,
+            volume DOUBLE,
+            SMA_20 DOUBLE,
+            SMA_50 DOUBLE,
+            SMA_200 DOUBLE,
+            RSI DOUBLE,
+            Volatility DOUBLE,
+            avg_volume_20 DOUBLE,
+            volume_ratio DOUBLE
+        ) timestamp(timestamp) PARTITION BY DAY;
+        """
+    ]
+
+    # Execute schema creation queries
+    for query in schema_queries:
+        try:
+            cursor.execute(query)
+            logging.info(f"Executed query successfully: {query[:50]}...")
+        except Exception as e:
+            logging.error(f"Error executing query: {query[:50]}... Error: {e}")
+            raise
+
+    # Rankings persisted before features were stored with them lack the feature columns
+    for column in RESULT_FEATURES:
+        try:
+            cursor.execute(f"ALTER TABLE stock_rankings ADD COLUMN {column} DOUBLE;")
+            logging.info(f"Added column {column} to stock_rankings")
+        except Exception:
+            # Already there
+            pass
+
+    # Enable dedup on tables created before it was part of the schema. Tables already holding
+    # duplicates are rewritten into a deduplicated WAL copy. Otherwise only WAL tables take dedup
+    # keys, and QuestDB converts a table to WAL on its next restart, so an older non-WAL table is
+    # converted here and gets its keys when this script runs again after the restart.
+    for table in DEDUP_TABLES:
+        enable_dedup(cursor, table)
+
+def enable_dedup(cursor, table):
+    """Turn on upsert keys for a table, or start its conversion to WAL so they can be enabled later"""
+    # Dedup only applies to new writes, so duplicates stored before it was enabled are rewritten away
+    if count_duplicate_keys(cursor, table):
+        rewrite_deduplicated(cursor, table)
+        return
+    try:
+        cursor.execute(f"ALTER TABLE {table} DEDUP ENABLE UPSERT KEYS(timestamp, symbol);")
+    except Exception as e:
+        logging.warning(f"Could not enable dedup on {table}: {e}")
+        try:
+            cursor.execute(f"ALTER TABLE {table} SET TYPE WAL;")
+            logging.warning(
+                f"Converting {table} to WAL; restart QuestDB and run init_db.py again "
+                "to enable dedup, until then rewritten rows are stored twice"
+            )
+        except Exception as e:
+            logging.error(f"Could not convert {table} to WAL: {e}")
+
+def count_duplicate_keys(cursor, table):
+    """Number of (timestamp, symbol) keys stored more than once"""
+    try:
+        cursor.execute(
+            f"SELECT count() FROM (SELECT timestamp, symbol, count() AS n FROM {table}) WHERE n > 1;"
+        )
+        return cursor.fetchone()[0]
+    except Exception as e:
+        logging.error(f"Could not check {table} for duplicate rows: {e}")
+        return 0
+
+def rewrite_deduplicated(cursor, table):
+    """Replace a table with a deduplicated WAL copy that has upsert keys, keeping the last row per key"""
+    cursor.execute(f"SELECT \"column\", indexed FROM table_columns('{table}');")
+    columns = cursor.fetchall()
+    values = [name for name, _ in columns if name not in ('timestamp', 'symbol')]
+    # Rows sharing a timestamp keep insertion order, so last() picks the newest write as an upsert would
+    projection = ', '.join(['timestamp', 'symbol'] + [f"last({name}) AS {name}" for name in values])
+    staging = f"{table}_dedup"
+
+    logging.warning(f"Rewriting {table} to drop duplicate rows stored before dedup was enabled")
+    cursor.execute(f"DROP TABLE IF EXISTS {staging};")
+    cursor.execute(
+        f"CREATE TABLE {staging} AS (SELECT {projection} FROM {table} ORDER BY timestamp) "
+        "TIMESTAMP(timestamp) PARTITION BY DAY WAL;"
+    )
+    cursor.execute(f"ALTER TABLE {staging} DEDUP ENABLE UPSERT KEYS(timestamp, symbol);")
+    cursor.execute(f"DROP TABLE {table};")
+    cursor.execute(f"RENAME TABLE '{staging}' TO '{table}';")
+    # CREATE TABLE AS does not carry symbol indexes over
+    for name, indexed in columns:
+        if indexed:
+            cursor.execute(f"ALTER TABLE {table} ALTER COLUMN {name} ADD INDEX;")
+    logging.info(f"Rewrote {table} without duplicates, with dedup enabled")
+
 if __name__ == "__main__":
     # Set up logging
     logging.basicConfig(
@@ -0,0 +1,91 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_loader import BulkDataLoader, HISTORY_COLUMNS
+from src.stock_analyzer import StockAnalyzer
+from src.synthetic_data import generate_history
+from src.universe import UniverseStore
+
+def fetchall_rows(symbols: int, days: int):
+    """Rows as psycopg2's cursor.fetchall() returns them: tuples of datetime, str, floats and int"""
+    history = generate_history(symbols, days)
+    frame = pd.concat(history.values(), ignore_index=True)
+    return list(zip(
+        frame['timestamp'].dt.to_pydatetime(), frame['symbol'], frame['open'].tolist(),
+        frame['high'].tolist(), frame['low'].tolist(), frame['close'].tolist(), frame['volume'].tolist()
+    ))
+
+def result_frame(rows) -> pd.DataFrame:
+    """The frame BulkDataLoader._fetch_frame builds from a PG result"""
+    frame = pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+    return frame
+
+def measure(build):
+    """Retained bytes reported by the built object, allocation peak and seconds of build()"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    held, nbytes = build()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return {'retained_bytes': int(nbytes), 'peak_bytes': int(peak), 'seconds': elapsed}
+
+def report(symbols: int, days: int):
+    rows = fetchall_rows(symbols, days)
+    analyzer = StockAnalyzer()
+    splitter = BulkDataLoader(pool=None)
+
+    def dataframes():
+        history = splitter._split_by_symbol(result_frame(rows))
+        history = analyzer.calculate_technical_indicators_batch(history)
+        return history, sum(df.memory_usage(deep=True).sum() for df in history.values())
+
+    def universe(dtype):
+        def build():
+            store = UniverseStore.from_frame(result_frame(rows), dtype)
+            store.compute_indicators()
+            return store, store.nbytes()
+        return build
+
+    results = {
+        'dataframes': measure(dataframes),
+        'universe_float64': measure(universe(np.float64)),
+        'universe_float32': measure(universe(np.float32))
+    }
+    baseline = results['dataframes']['retained_bytes']
+    for result in results.values():
+        result['vs_dataframes'] = result['retained_bytes'] / baseline
+    return {'symbols': symbols, 'days': days, 'rows': len(rows), 'paths': results}
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(description="Compare memory of per-symbol DataFrames with the UniverseStore")
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--days', type=int, default=750)
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    result = report(args.symbols, args.days)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['rows']:,} rows ({args.symbols} symbols x {args.days} days), indicators included")
+        print(f"{'path':<18} {'retained MB':>12} {'peak MB':>10} {'seconds':>9} {'vs frames':>10}")
+        for name, path in result['paths'].items():
+            print(
+                f"{name:<18} {path['retained_bytes'] / 2**20:>12.1f} {path['peak_bytes'] / 2**20:>10.1f} "
+                f"{path['seconds']:>9.2f} {path['vs_dataframes']:>9.2f}x"
+            )
@@ -1,16 +1,32 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
 import uvicorn
 import logging
+import time
 import os
+import sys
 
-# Import analyzer
-from src.stock_analyzer import StockAnalyzer
-from src.stock_data_collector import StockDataCollector
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Heavy modules (pandas, sklearn, textblob, questdb.ingress) load with the components, on first use
+from src.ranking_snapshot import RankingSnapshot
+from src.scheduler import CollectionScheduler, RunLock
+from src.broadcast import RankingBroadcaster
+from src.jobs import JobManager, RequestCoalescer
+from src.db_pool import ConnectionPool
+from src.metrics import metrics
+from src.lazy import LazyObject, is_built
+from src.screener import screen
+from src.http_cache import make_etag, not_modified, validator_headers
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,6 +42,40 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+class StreamSafeGZipMiddleware(GZipMiddleware):
+    """GZip that passes the given paths through untouched.
+
+    The pinned Starlette compresses every content type, so Server-Sent Events would sit in the gzip
+    buffer instead of reaching the browser as they are sent.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, exclude_paths: Tuple[str, ...] = ()):
+        super().__init__(app, minimum_size=minimum_size)
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Ranking payloads compress well; the SSE stream must not be buffered
+app.add_middleware(
+    StreamSafeGZipMiddleware,
+    minimum_size=int(os.getenv('API_GZIP_MIN_SIZE', '1000')),
+    exclude_paths=("/api/stream",)
+)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and time them per endpoint (not per path, to keep symbols out of the labels)"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    endpoint = request.scope.get('endpoint')
+    name = getattr(endpoint, '__name__', 'other')
+    metrics.observe('http_request_seconds', time.perf_counter() - start, endpoint=name)
+    metrics.inc('http_requests_total', endpoint=name, status=response.status_code)
+    return response
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static", html=True), name="static")
@@ -34,8 +84,128 @@ app.mount("/static", StaticFiles(directory="static", html=True), name="static")
 questdb_host = os.getenv('QUESTDB_HOST', 'questdb')
 questdb_port = int(os.getenv('QUESTDB_PORT', '8812'))
 
-analyzer = StockAnalyzer(db_host=questdb_host, db_port=questdb_port)
-collector = StockDataCollector(db_host=questdb_host, db_port=questdb_port)
+# One lazily opened pool shared by the analyzer, the collector and the snapshot
+pool = ConnectionPool(
+    questdb_host,
+    questdb_port,
+    minconn=int(os.getenv('DB_POOL_MIN', '1')),
+    maxconn=int(os.getenv('DB_POOL_MAX', '10')),
+    checkout_timeout=float(os.getenv('DB_POOL_TIMEOUT', '30'))
+)
+def build_analyzer():
+    """The analyzer, imported and constructed on first use so the app starts without pandas or sklearn"""
+    from src.indicator_state import IndicatorStateStore
+    from src.stock_analyzer import StockAnalyzer
+
+    return StockAnalyzer(
+        db_host=questdb_host,
+        db_port=questdb_port,
+        workers=int(os.getenv('ANALYZER_WORKERS', '1')),
+        chunk_size=int(os.getenv('ANALYZER_CHUNK_SIZE', '8')),
+        symbol_timeout=float(os.getenv('ANALYZER_SYMBOL_TIMEOUT', '120')),
+        history_days=int(os.getenv('ANALYZER_HISTORY_DAYS', '0')) or None,
+        http_url=os.getenv('QUESTDB_HTTP_URL'),
+        indicator_state=IndicatorStateStore.load(os.getenv('INDICATOR_STATE_PATH')),
+        model_cache_size=int(os.getenv('MODEL_CACHE_SIZE', '256')),
+        model_cache_dir=os.getenv('MODEL_CACHE_DIR'),
+        prediction_mode=os.getenv('ANALYZER_PREDICTION_MODE', 'per_symbol'),
+        model_jobs=int(os.getenv('ANALYZER_MODEL_JOBS', '-1')),
+        pool=pool,
+        sentiment_half_life_days=float(os.getenv('SENTIMENT_HALF_LIFE_DAYS', '0')) or None,
+        sentiment_cache_size=int(os.getenv('SENTIMENT_CACHE_SIZE', '10000')),
+        history_cache_dir=os.getenv('HISTORY_CACHE_DIR'),
+        universe_dtype=os.getenv('ANALYZER_UNIVERSE_DTYPE'),
+        feature_source=os.getenv('ANALYZER_FEATURE_SOURCE', 'pandas')
+    )
+
+def build_collector():
+    """The collector, sharing the analyzer's indicator state, sentiment scorer and history cache"""
+    from src.stock_data_collector import StockDataCollector
+
+    return StockDataCollector(
+        db_host=questdb_host,
+        db_port=questdb_port,
+        indicator_state=analyzer.indicator_state,
+        ilp_port=int(os.getenv('QUESTDB_ILP_PORT', '9009')),
+        ingestion_mode=os.getenv('INGESTION_MODE', 'ilp'),
+        batch_rows=int(os.getenv('INGESTION_BATCH_ROWS', '10000')),
+        fetch_workers=int(os.getenv('FETCH_WORKERS', '4')),
+        fetch_batch_size=int(os.getenv('FETCH_BATCH_SIZE', '20')),
+        fetch_rate=float(os.getenv('FETCH_RATE', '2.0')),
+        pool=pool,
+        sentiment=analyzer.sentiment,
+        history_cache=analyzer.history_cache,
+        symbols=[s for s in os.getenv('COLLECTOR_SYMBOLS', '').split(',') if s] or None,
+        wal_visibility_timeout=float(os.getenv('WAL_VISIBILITY_TIMEOUT', '30'))
+    )
+
+# Built on first use (a request or the background warm-up), so importing the app stays cheap
+analyzer = LazyObject(build_analyzer)
+collector = LazyObject(build_collector)
+# RANKING_SOURCE=persisted serves what a standalone `python -m src.scheduler` computes, polling for new rankings
+snapshot = RankingSnapshot(
+    analyzer,
+    refresh_interval=int(os.getenv('RANKING_REFRESH_INTERVAL', '300')),
+    persist=os.getenv('RANKING_PERSIST', 'false').lower() == 'true',
+    follow=os.getenv('RANKING_SOURCE', 'computed') == 'persisted',
+    retention_days=float(os.getenv('RANKING_RETENTION_DAYS', '7')) or None
+)
+# Dashboards subscribe to /api/stream instead of polling; every snapshot refresh pushes a diff
+broadcaster = RankingBroadcaster(
+    top_n=10,
+    max_pending=int(os.getenv('STREAM_MAX_PENDING', '8')),
+    keepalive=float(os.getenv('STREAM_KEEPALIVE_SECONDS', '15'))
+)
+snapshot.add_listener(broadcaster.publish)
+# Scheduled and manual updates share the lock; with a path it also excludes a standalone `python -m src.scheduler`
+scheduler = CollectionScheduler(
+    lambda: collector.collect_all_data(max_symbols=int(os.getenv('COLLECTOR_MAX_SYMBOLS', '0')) or None),
+    on_complete=snapshot.refresh,
+    market_interval=int(os.getenv('SCHEDULER_MARKET_INTERVAL', '900')),
+    off_hours_interval=int(os.getenv('SCHEDULER_OFF_HOURS_INTERVAL', '0')),
+    settle_delay=int(os.getenv('SCHEDULER_SETTLE_DELAY', '900')),
+    lock=RunLock(os.getenv('COLLECTION_LOCK_PATH'))
+)
+
+# Blocking analysis and DB work runs here so the event loop stays free for other requests
+analysis_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('API_ANALYSIS_THREADS', '4')), thread_name_prefix='analysis'
+)
+coalescer = RequestCoalescer(analysis_executor)
+jobs = JobManager(max_workers=1)
+
+# Handlers name analyzer methods inside the callables they hand to the executor: resolving an attribute
+# builds the analyzer (importing pandas and sklearn), which must not happen on the event loop
+
+def profiled(fn: Callable, *args) -> Tuple:
+    """Run fn(*args) and return its result with the per-stage timing breakdown"""
+    with metrics.profile() as breakdown:
+        result = fn(*args)
+    return result, breakdown
+
+async def ensure_snapshot():
+    """Compute the first ranking on demand when no refresh has run yet"""
+    if snapshot.generated_at is None:
+        await coalescer.run('snapshot-refresh', snapshot.refresh)
+
+def conditional(request: Request, response: Response, *parts) -> Optional[Response]:
+    """Validators for a response derived from the current snapshot; a 304 when the client's copy is current"""
+    etag = make_etag(snapshot.version, request.url.path, *parts)
+    headers = validator_headers(etag, snapshot.modified_at)
+    if not_modified(request.headers, etag, snapshot.modified_at):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def run_data_update() -> Dict:
+    """Collect new data, then refresh the ranking snapshot; skipped if a scheduled run is in progress"""
+    result = scheduler.run_once()
+    if result.get('skipped'):
+        return {"skipped": True}
+    return {
+        "refreshed_symbols": result.get('refreshed'),
+        "collected": {key: result.get(key) for key in ('planned', 'updated', 'error')}
+    }
 
 class StockAnalysis(BaseModel):
     symbol: str
@@ -44,46 +214,257 @@ class StockAnalysis(BaseModel):
     sentiment_score: float
     overall_score: float
 
+class TopStocksResponse(BaseModel):
+    generated_at: Optional[datetime]
+    staleness_seconds: Optional[float]
+    stocks: List[StockAnalysis]
+    profile: Optional[Dict[str, Dict[str, float]]] = None
+
+def warm_up(prewarm: bool):
+    """Load the persisted ranking, then (with prewarm) build the components and fill the model and ranking caches"""
+    try:
+        if snapshot.persist or snapshot.follow:
+            snapshot.load_snapshot()
+        if prewarm:
+            start = time.perf_counter()
+            snapshot.refresh()
+            logger.info(f"Warm-up finished in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        logger.error(f"Error warming up: {e}")
+    if snapshot.refresh_interval > 0:
+        # A warm-up refresh already ran; without one, stay lazy until a request or the first interval
+        snapshot.start(delay=snapshot.refresh_interval)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start the background work without blocking, so the port is bound before anything heavy loads"""
+    broadcaster.attach(asyncio.get_running_loop())
+    prewarm = os.getenv('API_PREWARM', 'true').lower() == 'true'
+    if prewarm or snapshot.persist or snapshot.follow or snapshot.refresh_interval > 0:
+        threading.Thread(target=warm_up, args=(prewarm,), name='warm-up', daemon=True).start()
+    if os.getenv('SCHEDULER_ENABLED', 'false').lower() == 'true':
+        scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    scheduler.stop()
+    snapshot.stop()
+    jobs.shutdown()
+    analysis_executor.shutdown(wait=False)
+    if is_built(analyzer):
+        analyzer.close()
+    pool.close()
+
 @app.get("/")
 async def root():
     """Redirect to dashboard"""
     return RedirectResponse(url="/static/index.html")
 
-@app.get("/api/top-stocks", response_model=List[StockAnalysis])
-async def get_top_stocks():
-    """Get top 10 stock picks"""
+@app.get("/api/top-stocks", response_model=TopStocksResponse)
+async def get_top_stocks(request: Request, response: Response, profile: bool = False):
+    """Get top 10 stock picks from the precomputed ranking snapshot; revalidates with ETag/Last-Modified"""
     try:
-        stocks = analyzer.get_top_stocks(10)
+        if profile:
+            # Rank from scratch (bypassing the snapshot) so every stage shows up in the breakdown
+            loop = asyncio.get_running_loop()
+            stocks, breakdown = await loop.run_in_executor(
+                analysis_executor, profiled, lambda n: analyzer.get_top_stocks(n), 10
+            )
+            return {"generated_at": datetime.utcnow(), "staleness_seconds": 0.0, "stocks": stocks, "profile": breakdown}
+
+        await ensure_snapshot()
+        cached = conditional(request, response)
+        if cached is not None:
+            return cached
+        stocks = snapshot.top(10)
         if not stocks:
             raise HTTPException(status_code=404, detail="No stocks found")
-        return stocks
+        return {
+            "generated_at": snapshot.generated_at,
+            "staleness_seconds": snapshot.staleness_seconds,
+            "stocks": stocks
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting top stocks: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/screener")
+async def screen_stocks(request: Request, response: Response,
+                        filters: List[str] = Query([], alias="filter"),
+                        sort: str = "overall_score",
+                        order: str = Query("desc", regex="^(asc|desc)$"),
+                        limit: int = Query(50, ge=1, le=1000),
+                        cursor: Optional[str] = None):
+    """Filter (e.g. filter=RSI>=30&filter=RSI<=70), sort and page the full precomputed ranking"""
+    try:
+        await ensure_snapshot()
+        cached = conditional(request, response, request.url.query)
+        if cached is not None:
+            return cached
+        page = screen(snapshot.ranking(), filters, sort, order == "desc", limit, cursor)
+        return dict(page, generated_at=snapshot.generated_at, staleness_seconds=snapshot.staleness_seconds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error screening stocks: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/stocks")
+async def get_stocks(request: Request, response: Response, symbols: str):
+    """Precomputed analysis of several symbols at once (comma-separated), without retraining"""
+    try:
+        wanted = [s for s in symbols.split(',') if s]
+        if not wanted:
+            raise HTTPException(status_code=400, detail="No symbols given")
+        await ensure_snapshot()
+        cached = conditional(request, response, ','.join(wanted))
+        if cached is not None:
+            return cached
+        results = snapshot.results_for(wanted)
+        return {
+            "generated_at": snapshot.generated_at,
+            "staleness_seconds": snapshot.staleness_seconds,
+            "stocks": [results[symbol] for symbol in wanted if symbol in results],
+            "missing": [symbol for symbol in wanted if symbol not in results]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting stocks: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/stream")
+async def stream_rankings():
+    """Server-Sent Events: the current top 10, then a diff each time the ranking snapshot changes"""
+    return StreamingResponse(
+        broadcaster.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/stock/{symbol}")
-async def get_stock_details(symbol: str):
-    """Get detailed analysis for a specific stock"""
+async def get_stock_details(symbol: str, profile: bool = False):
+    """Get detailed analysis for a specific stock; profile=true adds a per-stage timing breakdown"""
     try:
-        analysis = analyzer.predict_stock_performance(symbol)
+        breakdown = None
+        if profile:
+            loop = asyncio.get_running_loop()
+            analysis, breakdown = await loop.run_in_executor(
+                analysis_executor, profiled, lambda s: analyzer.predict_stock_performance(s), symbol
+            )
+        else:
+            analysis = await coalescer.run(
+                ('stock', symbol), lambda s: analyzer.predict_stock_performance(s), symbol
+            )
         if not analysis:
             raise HTTPException(status_code=404, detail=f"Stock {symbol} not found")
+        if breakdown is not None:
+            analysis = dict(analysis, profile=breakdown)
         return analysis
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing stock {symbol}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/update-data")
+@app.get("/api/stock/{symbol}/indicators")
+async def get_stock_indicators(symbol: str):
+    """Get the latest technical indicators from the streaming indicator state"""
+    try:
+        indicators = await coalescer.run(('indicators', symbol), lambda s: analyzer.get_latest_indicators(s), symbol)
+        if indicators is None:
+            raise HTTPException(status_code=404, detail=f"Stock {symbol} not found")
+        # NaN is not valid JSON; report indicators without enough bars as null
+        return {
+            "symbol": symbol,
+            "indicators": {k: (None if v != v else v) for k, v in indicators.items()}
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting indicators for {symbol}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/features")
+async def get_features(symbols: Optional[str] = None):
+    """Latest indicator, volume and sentiment features per symbol (comma-separated symbols, all when omitted)"""
+    try:
+        wanted = [s for s in symbols.split(',') if s] if symbols else None
+        key = ('features', tuple(wanted) if wanted else None)
+        source, features = await coalescer.run(
+            key, lambda w: (analyzer.feature_source, analyzer.load_features(w)), wanted
+        )
+        # NaN is not valid JSON; report features without enough bars as null
+        return {
+            "source": source,
+            "features": {
+                symbol: {k: (None if v != v else v) for k, v in values.items()}
+                for symbol, values in features.items()
+            }
+        }
+    except Exception as e:
+        logger.error(f"Error getting features: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Model and sentiment cache hit/miss counters (for this process; pool workers keep their own)"""
+    if not is_built(analyzer):
+        # Nothing has been cached yet; report empty caches rather than build the analyzer here
+        return {"models": None, "sentiment": None}
+    return {
+        "models": analyzer.model_registry.stats(),
+        "sentiment": analyzer.sentiment.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Stage timings, row and symbol counters, cache and pool gauges in the Prometheus text format"""
+    for name, value in pool.stats().items():
+        metrics.set_gauge(f"db_pool_{name}", value)
+    if is_built(analyzer):
+        for cache, stats in (('models', analyzer.model_registry.stats()), ('sentiment', analyzer.sentiment.stats())):
+            for name, value in stats.items():
+                metrics.set_gauge(f"cache_{name}", value, cache=cache)
+    metrics.set_gauge("stream_subscribers", broadcaster.subscribers)
+    if snapshot.staleness_seconds is not None:
+        metrics.set_gauge("ranking_staleness_seconds", snapshot.staleness_seconds)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/api/update-data", status_code=202)
 async def update_data():
-    """Trigger data update"""
+    """Trigger a background data update; an update already in progress is reused"""
     try:
-        collector.collect_all_data()
-        return {"status": "success", "message": "Data update triggered successfully"}
+        job = jobs.submit('update-data', run_data_update)
+        return {
+            "status": "accepted",
+            "job_id": job['id'],
+            "message": "Data update triggered successfully"
+        }
     except Exception as e:
         logger.error(f"Error updating data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/scheduler")
+async def get_scheduler_status():
+    """Collection scheduler state: whether it runs, market hours, the last run and the next one"""
+    return scheduler.status()
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status of a background job"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "questdb": f"{questdb_host}:{questdb_port}"}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "questdb": f"{questdb_host}:{questdb_port}",
+        "db_pool": pool.stats()
+    }
\ No newline at end of file
@@ -0,0 +1,226 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db_pool import ConnectionPool
+from src.ingestion import BulkIngestor, to_naive_nanos
+from src.stock_analyzer import StockAnalyzer
+
+# Analyzer owned by each backtest worker process; only its DB-free methods are used
+_worker_analyzer = None
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = StockAnalyzer()
+
+def _run_task(task: Tuple) -> List[Dict]:
+    return evaluate_positions(_worker_analyzer, *task)
+
+def sentiment_as_of(stamps: np.ndarray, scores: np.ndarray, as_of: int,
+                    half_life_days: Optional[float] = None) -> float:
+    """Sentiment aggregate over news stamped at or before as_of (epoch nanos), as the analyzer computes it live"""
+    count = int(np.searchsorted(stamps, as_of, side='right'))
+    if count == 0:
+        return 0.0
+    if not half_life_days:
+        return float(scores[:count].mean())
+    ages = (as_of - stamps[:count]) / (half_life_days * 86400e9)
+    weights = np.power(0.5, ages)
+    return float((weights * scores[:count]).sum() / weights.sum())
+
+def evaluate_positions(analyzer: StockAnalyzer, symbol: str, hist_data: pd.DataFrame,
+                       news_stamps: np.ndarray, news_scores: np.ndarray, positions: List[int],
+                       half_life_days: Optional[float] = None) -> List[Dict]:
+    """Predict the next-bar return at each bar position using only rows up to that position"""
+    close = hist_data['close'].to_numpy(dtype=np.float64)
+    stamps = to_naive_nanos(hist_data['timestamp'])
+    rows = []
+    for i in positions:
+        # Indicators are causal (rolling/ewm over past rows), so slicing after computing them is lookahead-free
+        as_of = hist_data.iloc[:i + 1]
+        try:
+            sentiment_score = sentiment_as_of(news_stamps, news_scores, stamps[i], half_life_days)
+            prediction = analyzer.fit_model(as_of, sentiment_score)['prediction']
+            actual = close[i + 1] / close[i] - 1
+            rows.append({
+                'timestamp': stamps[i],
+                'symbol': symbol,
+                'predicted_direction': int(np.sign(prediction)),
+                'actual_direction': int(np.sign(actual)),
+                'predicted_return': float(prediction),
+                'actual_return': float(actual),
+                'confidence_score': analyzer.calculate_overall_score(prediction, sentiment_score)
+            })
+        except Exception as e:
+            analyzer.logger.error(f"Error backtesting {symbol} at position {i}: {e}")
+    return rows
+
+
+class BacktestEngine:
+    """Walk-forward replay of stored history: one as-of prediction per symbol-day, scored against the next bar"""
+
+    def __init__(self, analyzer: StockAnalyzer, ingestor: Optional[BulkIngestor] = None, workers: int = 1,
+                 chunk_days: int = 20, min_history: int = 60, step: int = 1,
+                 table: str = 'algorithm_performance'):
+        self.logger = logging.getLogger(__name__)
+        self.analyzer = analyzer
+        self.ingestor = ingestor
+        self.workers = workers
+        self.chunk_days = chunk_days
+        # Bars a symbol needs before its first prediction
+        self.min_history = max(min_history, 2)
+        self.step = step
+        self.table = table
+
+    def load(self, symbols: Optional[List[str]] = None) -> Tuple[Dict, Dict]:
+        """Load full history with indicators, plus each symbol's news stamps and stored polarity"""
+        history = self.analyzer.loader.load_history(symbols)
+        history = self.analyzer.calculate_technical_indicators_batch(history)
+        news = {}
+        for symbol, frame in self.analyzer.loader.load_news(list(history)).items():
+            frame = frame.dropna(subset=['sentiment'])
+            news[symbol] = (to_naive_nanos(frame['timestamp']), frame['sentiment'].to_numpy(dtype=np.float64))
+        return history, news
+
+    def make_tasks(self, history: Dict[str, pd.DataFrame], news: Dict[str, Tuple],
+                   start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Tuple]:
+        """Split every symbol's evaluation days into chunks so work spreads across symbols and dates"""
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        tasks = []
+        for symbol, hist_data in history.items():
+            stamps = hist_data['timestamp']
+            # The last bar has no next bar to score against
+            positions = [
+                i for i in range(self.min_history - 1, len(hist_data) - 1, self.step)
+                if (start is None or stamps.iloc[i] >= start) and (end is None or stamps.iloc[i] < end)
+            ]
+            if not positions:
+                continue
+            news_stamps, news_scores = news.get(symbol, empty)
+            # Only rows up to the chunk's last position are shipped to the worker
+            for lo in range(0, len(positions), self.chunk_days):
+                chunk = positions[lo:lo + self.chunk_days]
+                tasks.append((
+                    symbol, hist_data.iloc[:chunk[-1] + 2], news_stamps, news_scores, chunk,
+                    self.analyzer.sentiment_half_life_days
+                ))
+        return tasks
+
+    def evaluate(self, tasks: List[Tuple]) -> List[Dict]:
+        """Run tasks in this process or across spawned workers"""
+        if self.workers <= 1:
+            return [row for task in tasks for row in evaluate_positions(self.analyzer, *task)]
+
+        rows = []
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        ) as executor:
+            futures = {executor.submit(_run_task, task): task[0] for task in tasks}
+            for future in as_completed(futures):
+                try:
+                    rows.extend(future.result())
+                except Exception as e:
+                    self.logger.error(f"Error backtesting {futures[future]}: {e}")
+        return rows
+
+    def write_results(self, rows: List[Dict]) -> int:
+        """Bulk-write prediction rows into algorithm_performance; reruns upsert on (timestamp, symbol)"""
+        if self.ingestor is None or not rows:
+            return 0
+        rows = sorted(rows, key=lambda row: (row['timestamp'], row['symbol']))
+        return self.ingestor.write(
+            self.table,
+            np.array([row['timestamp'] for row in rows], dtype=np.int64),
+            {'symbol': [row['symbol'] for row in rows]},
+            {
+                name: [row[name] for row in rows]
+                for name in ('predicted_direction', 'actual_direction', 'predicted_return',
+                             'actual_return', 'confidence_score')
+            }
+        )
+
+    @staticmethod
+    def summarize(rows: List[Dict], elapsed: float) -> Dict:
+        """Hit rate and throughput for one backtest run"""
+        predicted = np.array([row['predicted_direction'] for row in rows])
+        actual = np.array([row['actual_direction'] for row in rows])
+        errors = np.array([row['predicted_return'] - row['actual_return'] for row in rows])
+        return {
+            'symbols': len({row['symbol'] for row in rows}),
+            'symbol_days': len(rows),
+            'hit_rate': float((predicted == actual).mean()) if rows else None,
+            'mean_absolute_error': float(np.abs(errors).mean()) if rows else None,
+            'seconds': elapsed,
+            'symbol_days_per_second': len(rows) / elapsed if elapsed else None
+        }
+
+    def run(self, symbols: Optional[List[str]] = None, start: Optional[datetime] = None,
+            end: Optional[datetime] = None, write: bool = True) -> Dict:
+        """Backtest the given symbols (all when None) over [start, end) and return a summary"""
+        history, news = self.load(symbols)
+        tasks = self.make_tasks(history, news, start, end)
+        self.logger.info(f"Backtesting {len(history)} symbols in {len(tasks)} tasks on {self.workers} workers")
+
+        started = time.perf_counter()
+        rows = self.evaluate(tasks)
+        report = self.summarize(rows, time.perf_counter() - started)
+
+        report['written'] = self.write_results(rows) if write else 0
+        self.logger.info(
+            f"Backtested {report['symbol_days']} symbol-days, hit rate {report['hit_rate']}, "
+            f"{report['symbol_days_per_second'] or 0:.1f} symbol-days/s"
+        )
+        return report
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Walk-forward backtest that fills algorithm_performance")
+    parser.add_argument('--symbols', nargs='*', help="Symbols to replay (default: all stored)")
+    parser.add_argument('--start', type=datetime.fromisoformat, help="First as-of date (YYYY-MM-DD)")
+    parser.add_argument('--end', type=datetime.fromisoformat, help="Stop before this date (YYYY-MM-DD)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-days', type=int, default=20)
+    parser.add_argument('--min-history', type=int, default=60)
+    parser.add_argument('--step', type=int, default=1, help="Evaluate every step-th bar")
+    parser.add_argument('--dry-run', action='store_true', help="Report without writing results")
+    args = parser.parse_args()
+
+    questdb_host = os.getenv('QUESTDB_HOST', 'questdb')
+    pool = ConnectionPool(questdb_host, int(os.getenv('QUESTDB_PORT', '8812')), maxconn=2)
+    analyzer = StockAnalyzer(
+        db_host=questdb_host,
+        db_port=pool.port,
+        sentiment_half_life_days=float(os.getenv('SENTIMENT_HALF_LIFE_DAYS', '0')) or None,
+        pool=pool,
+        history_cache_dir=os.getenv('HISTORY_CACHE_DIR')
+    )
+    ingestor = BulkIngestor(
+        pool,
+        host=questdb_host,
+        ilp_port=int(os.getenv('QUESTDB_ILP_PORT', '9009')),
+        mode=os.getenv('INGESTION_MODE', 'ilp')
+    )
+    engine = BacktestEngine(
+        analyzer, ingestor, workers=args.workers, chunk_days=args.chunk_days,
+        min_history=args.min_history, step=args.step
+    )
+    try:
+        print(json.dumps(engine.run(args.symbols or None, args.start, args.end, write=not args.dry_run), indent=2))
+    finally:
+        ingestor.close()
+        pool.close()
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from src.metrics import metrics
+
+STOCK_FIELDS = ['symbol', 'predicted_return', 'technical_score', 'sentiment_score', 'overall_score']
+
+
+def stock_row(result: Dict) -> Dict:
+    """The dashboard's view of an analysis result, with plain floats so it serializes as JSON"""
+    row = {'symbol': result['symbol']}
+    row.update((name, float(result[name])) for name in STOCK_FIELDS[1:])
+    return row
+
+
+def ranking_diff(previous: List[Dict], current: List[Dict]) -> Dict:
+    """Rows that are new or changed, symbols that dropped out, and the new order"""
+    before = {row['symbol']: row for row in previous}
+    symbols = {row['symbol'] for row in current}
+    return {
+        'changed': [row for row in current if before.get(row['symbol']) != row],
+        'removed': [symbol for symbol in before if symbol not in symbols],
+        'order': [row['symbol'] for row in current]
+    }
+
+
+def sse_event(event: str, event_id: int, data: Dict) -> bytes:
+    payload = json.dumps(data, default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value))
+    return f"event: {event}\nid: {event_id}\ndata: {payload}\n\n".encode('utf-8')
+
+
+class RankingBroadcaster:
+    """Pushes ranking diffs to Server-Sent Events subscribers whenever a new snapshot is published.
+
+    Each event is serialized once and the same bytes are queued for every subscriber, so an idle
+    client costs one small queue and a suspended coroutine. A client that falls max_pending events
+    behind has its backlog dropped and is sent the full ranking instead.
+    """
+
+    def __init__(self, top_n: int = 10, max_pending: int = 8, keepalive: float = 15.0):
+        self.logger = logging.getLogger(__name__)
+        self.top_n = top_n
+        self.max_pending = max_pending
+        self.keepalive = keepalive
+        self.version = 0
+        self.generated_at: Optional[datetime] = None
+        self._ranking: List[Dict] = []
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # publish() runs on refresh threads; the event loop owns the subscriber queues
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """Set the event loop that serves the stream; call from the loop at startup"""
+        self._loop = loop
+
+    def publish(self, ranking: List[Dict], generated_at: Optional[datetime]):
+        """Broadcast the diff against the last published ranking; safe to call from any thread"""
+        rows = [stock_row(result) for result in ranking[:self.top_n]]
+        with self._lock:
+            diff = ranking_diff(self._ranking, rows)
+            if not diff['changed'] and not diff['removed'] and generated_at == self.generated_at:
+                return
+            self._ranking = rows
+            self.generated_at = generated_at
+            self.version += 1
+            diff['generated_at'] = generated_at
+            event = sse_event('diff', self.version, diff)
+
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._fan_out, event)
+
+    def snapshot_event(self) -> bytes:
+        with self._lock:
+            return sse_event('snapshot', self.version, {
+                'generated_at': self.generated_at,
+                'stocks': self._ranking
+            })
+
+    def _fan_out(self, event: bytes):
+        metrics.inc('stream_events_total', event='diff')
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind for the diffs to be worth replaying; resync it from the full ranking
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                metrics.inc('stream_resyncs_total')
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """One subscriber's event stream: the current ranking, then a diff per published snapshot"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        self._subscribers.add(queue)
+        try:
+            # Reconnecting browsers retry after 5s; the snapshot puts them back in sync
+            yield b"retry: 5000\n\n" + self.snapshot_event()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    # A comment line keeps proxies from closing an idle connection
+                    yield b": keepalive\n\n"
+                    continue
+                yield self.snapshot_event() if event is None else event
+        finally:
+            self._subscribers.discard(queue)
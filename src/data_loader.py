@@ -0,0 +1,173 @@
+import io
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+from src.universe import UniverseStore
+
+HISTORY_COLUMNS = ['timestamp', 'symbol', 'open', 'high', 'low', 'close', 'volume']
+NEWS_COLUMNS = ['timestamp', 'symbol', 'title', 'description', 'sentiment']
+
+
+def _quote(value) -> str:
+    """Render a value as a QuestDB SQL literal"""
+    if isinstance(value, datetime):
+        value = value.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class BulkDataLoader:
+    """Loads many symbols' rows in one projected, time-bounded query and splits them per symbol"""
+
+    def __init__(self, pool, http_url: Optional[str] = None, http_timeout: float = 60):
+        self.logger = logging.getLogger(__name__)
+        self.pool = pool
+        # QuestDB REST endpoint (e.g. http://questdb:9000); uses the CSV export when set
+        self.http_url = http_url.rstrip('/') if http_url else None
+        self.http_timeout = http_timeout
+
+    def _build_query(self, table: str, columns: List[str], symbols: Optional[List[str]],
+                     start: Optional[datetime], end: Optional[datetime]) -> str:
+        conditions = []
+        if symbols is not None:
+            conditions.append(f"symbol IN ({', '.join(_quote(s) for s in symbols)})")
+        if start is not None:
+            conditions.append(f"timestamp >= {_quote(start)}")
+        if end is not None:
+            conditions.append(f"timestamp < {_quote(end)}")
+
+        query = f"SELECT {', '.join(columns)} FROM {table}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        # Grouping rows by symbol lets the result be split with contiguous slices
+        return query + " ORDER BY symbol, timestamp"
+
+    def _fetch_frame(self, query: str, columns: List[str]) -> pd.DataFrame:
+        if self.http_url:
+            response = requests.get(
+                f"{self.http_url}/exp", params={'query': query}, timeout=self.http_timeout
+            )
+            response.raise_for_status()
+            frame = pd.read_csv(io.StringIO(response.text))
+            frame.columns = columns
+        else:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query)
+                frame = pd.DataFrame(cursor.fetchall(), columns=columns)
+                cursor.close()
+
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+        return frame
+
+    def _split_by_symbol(self, frame: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Split a symbol-ordered frame into per-symbol frames without copying.
+
+        Each frame's columns are views of slices of the fetched column arrays; copy=False keeps the
+        constructor from consolidating them into new blocks.
+        """
+        if frame.empty:
+            return {}
+
+        arrays = {column: frame[column].to_numpy() for column in frame.columns}
+        symbols = arrays['symbol']
+        starts = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1]])
+        stops = np.r_[starts[1:], len(symbols)]
+
+        return {
+            symbols[lo]: pd.DataFrame(
+                {column: values[lo:hi] for column, values in arrays.items()}, copy=False
+            )
+            for lo, hi in zip(starts, stops)
+        }
+
+    def load_history(self, symbols: Optional[List[str]] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """Load OHLCV history for the given symbols (all when None), keyed by symbol"""
+        query = self._build_query('stock_historical_data', HISTORY_COLUMNS, symbols, start, end)
+        frame = self._fetch_frame(query, HISTORY_COLUMNS)
+        self.logger.debug(f"Loaded {len(frame)} history rows in one query")
+        return self._split_by_symbol(frame)
+
+    def load_universe(self, symbols: Optional[List[str]] = None, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None, dtype=np.float64) -> UniverseStore:
+        """Load OHLCV history straight into a compact UniverseStore, skipping the per-symbol frames"""
+        query = self._build_query('stock_historical_data', HISTORY_COLUMNS, symbols, start, end)
+        return UniverseStore.from_frame(self._fetch_frame(query, HISTORY_COLUMNS), dtype)
+
+    def load_news(self, symbols: Optional[List[str]] = None, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """Load news rows for the given symbols (all when None), keyed by symbol"""
+        query = self._build_query('stock_news', NEWS_COLUMNS, symbols, start, end)
+        frame = self._fetch_frame(query, NEWS_COLUMNS)
+        return self._split_by_symbol(frame)
+
+    def load_sentiment(self, symbols: Optional[List[str]] = None, half_life_days: Optional[float] = None,
+                       start: Optional[datetime] = None) -> Dict[str, float]:
+        """Per-symbol mean of the stored news polarity, exponentially decayed by age when half_life_days is set"""
+        conditions = ["sentiment IS NOT NULL"]
+        if symbols is not None:
+            conditions.append(f"symbol IN ({', '.join(_quote(s) for s in symbols)})")
+        if start is not None:
+            conditions.append(f"timestamp >= {_quote(start)}")
+        where = " AND ".join(conditions)
+
+        if half_life_days:
+            # Weight halves every half_life_days of age; the aggregation runs inside QuestDB
+            half_life_seconds = float(half_life_days) * 86400
+            query = f"""
+            SELECT symbol, sum(sentiment * weight) / sum(weight)
+            FROM (
+                SELECT symbol, sentiment,
+                       power(0.5, datediff('s', timestamp, now()) / {half_life_seconds}) weight
+                FROM stock_news WHERE {where}
+            )
+            """
+        else:
+            query = f"SELECT symbol, avg(sentiment) FROM stock_news WHERE {where}"
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            scores = {row[0]: float(row[1]) for row in cursor.fetchall() if row[1] is not None}
+            cursor.close()
+        return scores
+
+    def get_symbols(self) -> List[str]:
+        """Return every symbol that has stored history"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT symbol FROM stock_historical_data")
+            symbols = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+        return symbols
+
+    def get_watermarks(self, symbols: Optional[List[str]] = None) -> Dict[str, Tuple]:
+        """Return the latest bar's timestamp, the row count and the latest bar's close and volume, then the
+        latest news timestamp and news count, per symbol (all when None).
+
+        Today's bar is rewritten in place until the close, so its close and volume are what change on an
+        intraday run.
+        """
+        if symbols is not None and not symbols:
+            return {}
+        where = f" WHERE symbol IN ({', '.join(_quote(s) for s in symbols)})" if symbols is not None else ""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT symbol, max(timestamp), count(), last(close), last(volume) FROM stock_historical_data"
+                + where
+            )
+            hist_marks = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+            cursor.execute("SELECT symbol, max(timestamp), count() FROM stock_news" + where)
+            news_marks = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+            cursor.close()
+
+        return {
+            symbol: marks + news_marks.get(symbol, (None, 0))
+            for symbol, marks in hist_marks.items()
+        }
@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+
+
+class ConnectionPool:
+    """Lazily created, thread-safe QuestDB connection pool with health checks and wait-time metrics"""
+
+    def __init__(self, host: str = 'questdb', port: int = 8812, minconn: int = 1, maxconn: int = 10,
+                 checkout_timeout: float = 30, health_check: bool = True,
+                 dbname: str = 'qdb', user: str = 'admin', password: str = 'quest'):
+        self.logger = logging.getLogger(__name__)
+        self.host = host
+        self.port = port
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.checkout_timeout = checkout_timeout
+        self.health_check = health_check
+        self._connect_args = {'dbname': dbname, 'user': user, 'password': password, 'host': host, 'port': port}
+        self._pool: Optional[pg_pool.ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # ThreadedConnectionPool raises when exhausted; the semaphore makes callers wait instead
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'checkouts': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+            'timeouts': 0,
+            'reconnects': 0,
+            'in_use': 0
+        }
+
+    def _get_pool(self) -> pg_pool.ThreadedConnectionPool:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    pool = pg_pool.ThreadedConnectionPool(self.minconn, self.maxconn, **self._connect_args)
+                    # minconn is only opened up front; putconn closes anything returned beyond pool.minconn
+                    # idle connections, so raise it to keep every connection for reuse. This sets the
+                    # attribute psycopg2's AbstractConnectionPool._putconn reads (checked against the pinned
+                    # psycopg2-binary 2.9.3); recheck it when upgrading.
+                    pool.minconn = self.maxconn
+                    self._pool = pool
+                    self.logger.info(f"Opened connection pool to {self.host}:{self.port}")
+        return self._pool
+
+    def _record(self, **changes):
+        with self._stats_lock:
+            for name, value in changes.items():
+                if name == 'wait_seconds_max':
+                    self._stats[name] = max(self._stats[name], value)
+                else:
+                    self._stats[name] += value
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout(self):
+        pool = self._get_pool()
+        # Idle connections come back first; after a QuestDB restart all of them are dead, so keep
+        # discarding until one passes or getconn opens a fresh one
+        for _ in range(self.maxconn + 1):
+            conn = pool.getconn()
+            if not self.health_check or self._is_healthy(conn):
+                conn.autocommit = True
+                return conn
+            pool.putconn(conn, close=True)
+            self._record(reconnects=1)
+        raise psycopg2.OperationalError(f"No healthy connection to {self.host}:{self.port}")
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the block"""
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            self._record(timeouts=1)
+            raise pg_pool.PoolError(f"Timed out after {self.checkout_timeout}s waiting for a connection")
+        waited = time.monotonic() - start
+        self._record(checkouts=1, wait_seconds_total=waited, wait_seconds_max=waited, in_use=1)
+
+        try:
+            conn = self._checkout()
+            broken = False
+            try:
+                yield conn
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                broken = True
+                raise
+            finally:
+                self._get_pool().putconn(conn, close=broken or conn.closed)
+        finally:
+            self._record(in_use=-1)
+            self._slots.release()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['max_connections'] = self.maxconn
+        stats['wait_seconds_avg'] = stats['wait_seconds_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+
+    def close(self):
+        """Close every pooled connection; the pool reopens lazily on next use"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
@@ -0,0 +1,7 @@
+# Kept free of imports so the API, the screener and the ranking snapshot can name features without pandas
+
+# Latest-bar values; NaN where a symbol has too few bars, as in the pandas indicators
+BAR_FEATURES = ['close', 'volume', 'SMA_20', 'SMA_50', 'SMA_200', 'RSI', 'Volatility']
+VOLUME_FEATURES = ['avg_volume_20', 'volume_ratio']
+# Stored on every analysis result, screened on, and persisted with the ranking
+RESULT_FEATURES = BAR_FEATURES + VOLUME_FEATURES
@@ -0,0 +1,285 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import HISTORY_COLUMNS
+from src.ingestion import to_naive_nanos
+from src.universe import UniverseStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within one process
+    fcntl = None
+
+# One raw little-endian array file per column; timestamps are epoch nanoseconds
+COLUMN_TYPES = {
+    'timestamp': np.dtype('<i8'),
+    'open': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'volume': np.dtype('<i8')
+}
+
+
+class HistoryCache:
+    """On-disk columnar copy of stock_historical_data, one directory of column files per symbol, read via mmap.
+
+    Each symbol's meta.json records how many rows are complete, so readers never map a half-written
+    append. The collector, API and pool workers and the backtest all write, so every append or drop
+    holds an exclusive flock on the symbol's lock file, and readers take a shared one while they map.
+    """
+
+    def __init__(self, path: str):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self._lock = threading.Lock()
+        # symbol -> ((rows, inode), {column: memmap}); remapped when the rows or the files change
+        self._maps: Dict[str, Tuple[Tuple, Dict[str, np.ndarray]]] = {}
+        os.makedirs(path, exist_ok=True)
+
+    def _dir(self, symbol: str) -> str:
+        return os.path.join(self.path, symbol)
+
+    @contextmanager
+    def _locked(self, symbol: str, exclusive: bool = True):
+        """Hold the symbol's lock file: exclusive for writers, shared for readers mapping the columns"""
+        directory = self._dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        # The lock file is never dropped, so every process locks the same inode
+        with self._lock if exclusive else nullcontext():
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(directory, 'lock'), 'a') as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _meta(self, symbol: str) -> Dict:
+        try:
+            with open(os.path.join(self._dir(symbol), 'meta.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'rows': 0, 'last_timestamp': None}
+
+    def _write_meta(self, symbol: str, meta: Dict):
+        directory = self._dir(symbol)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='meta.', suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+    def symbols(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.path)
+            if os.path.exists(os.path.join(self.path, name, 'meta.json'))
+        )
+
+    def rows(self, symbol: str) -> int:
+        return self._meta(symbol)['rows']
+
+    def last_timestamp(self, symbol: str) -> Optional[int]:
+        return self._meta(symbol)['last_timestamp']
+
+    def drop(self, symbol: str):
+        """Forget a symbol; the next read through CachedHistoryLoader refills it.
+
+        Files are unlinked rather than truncated, so existing mappings keep the old data.
+        """
+        with self._locked(symbol):
+            self._maps.pop(symbol, None)
+            directory = self._dir(symbol)
+            if os.path.exists(os.path.join(directory, 'meta.json')):
+                os.remove(os.path.join(directory, 'meta.json'))
+            for name in COLUMN_TYPES:
+                if os.path.exists(os.path.join(directory, name)):
+                    os.remove(os.path.join(directory, name))
+
+    def append(self, symbol: str, timestamps: np.ndarray, columns: Dict[str, np.ndarray]) -> int:
+        """Append rows newer than the cached ones; a row at the last cached timestamp replaces it"""
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = np.asarray(timestamps, dtype=np.int64)[order]
+        columns = {name: np.asarray(columns[name])[order] for name in COLUMN_TYPES if name != 'timestamp'}
+
+        with self._locked(symbol):
+            directory = self._dir(symbol)
+            meta = self._meta(symbol)
+            rows, last = meta['rows'], meta['last_timestamp']
+
+            if last is not None:
+                # Today's bar is re-collected until the day closes; rewrite it in place
+                same = timestamps == last
+                if same.any():
+                    i = np.flatnonzero(same)[-1]
+                    for name, dtype in COLUMN_TYPES.items():
+                        values = timestamps if name == 'timestamp' else columns[name]
+                        mapped = np.memmap(os.path.join(directory, name), dtype=dtype, mode='r+', shape=(rows,))
+                        mapped[rows - 1] = values[i]
+                        mapped.flush()
+                        del mapped
+                keep = timestamps > last
+                timestamps = timestamps[keep]
+                columns = {name: values[keep] for name, values in columns.items()}
+
+            if len(timestamps):
+                for name, dtype in COLUMN_TYPES.items():
+                    values = timestamps if name == 'timestamp' else columns[name]
+                    with open(os.path.join(directory, name), 'ab') as f:
+                        # Drop any tail left by an append that died before its meta update
+                        f.truncate(rows * dtype.itemsize)
+                        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+                self._write_meta(symbol, {'rows': rows + len(timestamps), 'last_timestamp': int(timestamps[-1])})
+            return len(timestamps)
+
+    def append_frame(self, symbol: str, df: pd.DataFrame) -> int:
+        """Append a yfinance-shaped frame (DatetimeIndex, Open/High/Low/Close/Volume columns)"""
+        return self.append(symbol, to_naive_nanos(df.index), {
+            'open': df['Open'].to_numpy(dtype=np.float64),
+            'high': df['High'].to_numpy(dtype=np.float64),
+            'low': df['Low'].to_numpy(dtype=np.float64),
+            'close': df['Close'].to_numpy(dtype=np.float64),
+            'volume': df['Volume'].to_numpy(dtype=np.int64)
+        })
+
+    def append_history(self, history: Dict[str, pd.DataFrame]) -> int:
+        """Append loader-shaped frames (timestamp/open/high/low/close/volume columns), keyed by symbol"""
+        appended = 0
+        for symbol, frame in history.items():
+            appended += self.append(symbol, to_naive_nanos(frame['timestamp']), {
+                name: frame[name].to_numpy() for name in COLUMN_TYPES if name != 'timestamp'
+            })
+        return appended
+
+    def read_columns(self, symbol: str, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Zero-copy read-only views of a symbol's columns, sliced to [start, end) by binary search"""
+        if self.rows(symbol) == 0:
+            return None
+
+        with self._locked(symbol, exclusive=False):
+            rows = self.rows(symbol)
+            if rows == 0:
+                return None
+            # A drop and refill replaces the files, possibly with the same row count
+            version = (rows, os.stat(os.path.join(self._dir(symbol), 'timestamp')).st_ino)
+            cached = self._maps.get(symbol)
+            if cached is None or cached[0] != version:
+                maps = {
+                    name: np.memmap(os.path.join(self._dir(symbol), name), dtype=dtype, mode='r', shape=(rows,))
+                    for name, dtype in COLUMN_TYPES.items()
+                }
+                self._maps[symbol] = cached = (version, maps)
+
+        maps = cached[1]
+        lo, hi = 0, rows
+        if start is not None:
+            lo = int(np.searchsorted(maps['timestamp'], to_naive_nanos([start])[0], side='left'))
+        if end is not None:
+            hi = int(np.searchsorted(maps['timestamp'], to_naive_nanos([end])[0], side='left'))
+        return {name: values[lo:hi] for name, values in maps.items()}
+
+    def load_history(self, symbols: Optional[List[str]] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """Cached history as loader-shaped frames, keyed by symbol; uncached symbols are left out"""
+        history = {}
+        for symbol in (self.symbols() if symbols is None else symbols):
+            columns = self.read_columns(symbol, start, end)
+            if columns is None or len(columns['timestamp']) == 0:
+                continue
+            frame = {'timestamp': columns['timestamp'].view('datetime64[ns]'), 'symbol': symbol}
+            frame.update((name, columns[name]) for name in HISTORY_COLUMNS[2:])
+            history[symbol] = pd.DataFrame(frame)
+        return history
+
+
+class CachedHistoryLoader:
+    """BulkDataLoader wrapper that serves history from a HistoryCache, filling it from QuestDB on a miss"""
+
+    def __init__(self, cache: HistoryCache, loader):
+        self.logger = logging.getLogger(__name__)
+        self.cache = cache
+        self.loader = loader
+
+    def _matches(self, symbol: str, marks: Tuple) -> bool:
+        """Whether the cached copy has the same last bar (timestamp, close, volume) and row count as QuestDB"""
+        last, rows, close, volume = marks[:4]
+        cached_last = self.cache.last_timestamp(symbol)
+        if cached_last is None or last is None:
+            return cached_last is None and last is None
+        if self.cache.rows(symbol) != rows or cached_last != int(to_naive_nanos([last])[0]):
+            return False
+        # Today's bar is rewritten in place by intraday runs
+        columns = self.cache.read_columns(symbol)
+        return ((close is None or columns['close'][-1] == close)
+                and (volume is None or columns['volume'][-1] == volume))
+
+    def _fill(self, symbols: Optional[List[str]]) -> List[str]:
+        """Bring the wanted symbols in line with QuestDB before a read.
+
+        Symbols the cache lacks get their full history, so later reads with an earlier start are not
+        short. Cached symbols are checked against the loader's watermarks, since other processes (a
+        standalone scheduler, another API worker) also write: ones that are behind are topped up from
+        their last cached bar, and dropped and refilled if that still leaves them out of line.
+        """
+        wanted = self.loader.get_symbols() if symbols is None else symbols
+        # Scoped to the symbols read, so a single-symbol request aggregates only that symbol's rows
+        watermarks = self.loader.get_watermarks(None if symbols is None else wanted)
+        cached = set(self.cache.symbols())
+        missing = [symbol for symbol in wanted if symbol not in cached]
+        stale = [
+            symbol for symbol in wanted
+            if symbol in cached and symbol in watermarks and not self._matches(symbol, watermarks[symbol])
+        ]
+
+        if stale:
+            # Rows before each symbol's last cached bar are skipped by append; the last one is rewritten
+            start = min(self.cache.last_timestamp(symbol) for symbol in stale)
+            self.cache.append_history(self.loader.load_history(stale, start=pd.Timestamp(start).to_pydatetime()))
+            diverged = [symbol for symbol in stale if not self._matches(symbol, watermarks[symbol])]
+            for symbol in diverged:
+                # Rows were rewritten or backfilled behind the cached tail; start the symbol over
+                self.cache.drop(symbol)
+            missing += diverged
+            self.logger.info(f"Topped up history cache for {len(stale) - len(diverged)}/{len(stale)} stale symbols")
+
+        if missing:
+            fetched = self.loader.load_history(missing)
+            self.cache.append_history(fetched)
+            self.logger.info(f"Filled history cache for {len(fetched)}/{len(missing)} symbols")
+        return wanted
+
+    def load_history(self, symbols: Optional[List[str]] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        return self.cache.load_history(self._fill(symbols), start, end)
+
+    def load_universe(self, symbols: Optional[List[str]] = None, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None, dtype=np.float64) -> UniverseStore:
+        """Copy the mapped columns straight into a UniverseStore"""
+        columns = {symbol: self.cache.read_columns(symbol, start, end) for symbol in self._fill(symbols)}
+        return UniverseStore.from_columns(
+            {symbol: views for symbol, views in columns.items() if views is not None}, dtype
+        )
+
+    # News, sentiment, symbols and watermarks still come from QuestDB
+    def load_news(self, *args, **kwargs) -> Dict[str, pd.DataFrame]:
+        return self.loader.load_news(*args, **kwargs)
+
+    def load_sentiment(self, *args, **kwargs) -> Dict[str, float]:
+        return self.loader.load_sentiment(*args, **kwargs)
+
+    def get_symbols(self) -> List[str]:
+        return self.loader.get_symbols()
+
+    def get_watermarks(self, symbols: Optional[List[str]] = None) -> Dict[str, Tuple]:
+        return self.loader.get_watermarks(symbols)
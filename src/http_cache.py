@@ -0,0 +1,42 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+
+def make_etag(*parts) -> str:
+    """Weak validator, since gzip may change the bytes of an otherwise equal response"""
+    return 'W/"' + hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:20] + '"'
+
+
+def http_date(value: datetime) -> str:
+    """An HTTP date from a naive UTC datetime, as the snapshot records them"""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def validator_headers(etag: str, modified_at: Optional[datetime]) -> Dict[str, str]:
+    # no-cache: clients may store the response but must revalidate, which costs a 304 when unchanged
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if modified_at is not None:
+        headers['Last-Modified'] = http_date(modified_at)
+    return headers
+
+
+def not_modified(request_headers, etag: str, modified_at: Optional[datetime]) -> bool:
+    """Whether the client's If-None-Match (preferred) or If-Modified-Since still matches"""
+    if_none_match = request_headers.get('if-none-match')
+    if if_none_match is not None:
+        weak = etag[2:] if etag.startswith('W/') else etag
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or any((tag[2:] if tag.startswith('W/') else tag) == weak for tag in tags)
+
+    if_modified_since = request_headers.get('if-modified-since')
+    if if_modified_since is None or modified_at is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified_at.replace(tzinfo=timezone.utc, microsecond=0) <= since
@@ -0,0 +1,115 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+INDICATOR_NAMES = ['SMA_20', 'SMA_50', 'SMA_200', 'RSI', 'MACD', 'Signal_Line', 'Volatility']
+
+
+class IndicatorMatrix:
+    """Indicators for many symbols, each stored as a (symbols x days) float64 array"""
+
+    __slots__ = ['symbols', 'lengths', 'arrays']
+
+    def __init__(self, symbols: List[str], lengths: np.ndarray, arrays: Dict[str, np.ndarray]):
+        self.symbols = symbols
+        self.lengths = lengths
+        self.arrays = arrays
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def for_symbol(self, symbol: str) -> Dict[str, np.ndarray]:
+        """Return one symbol's indicator series, without the NaN padding"""
+        row = self.symbols.index(symbol)
+        length = self.lengths[row]
+        return {name: values[row, values.shape[1] - length:] for name, values in self.arrays.items()}
+
+
+def build_close_matrix(frames: Dict[str, pd.DataFrame]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Stack per-symbol close series into a right-aligned, NaN-padded (symbols x days) matrix"""
+    symbols = list(frames)
+    lengths = np.array([len(frames[symbol]) for symbol in symbols], dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+
+    close = np.full((len(symbols), width), np.nan)
+    for row, symbol in enumerate(symbols):
+        if lengths[row]:
+            close[row, width - lengths[row]:] = frames[symbol]['close'].to_numpy(dtype=np.float64)
+    return symbols, lengths, close
+
+
+def _window_sums(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Trailing-window sum and count of non-NaN values along the day axis"""
+    valid = ~np.isnan(values)
+    padded = np.zeros((values.shape[0], values.shape[1] + 1))
+    counts = np.zeros_like(padded)
+    np.cumsum(np.where(valid, values, 0.0), axis=1, out=padded[:, 1:])
+    np.cumsum(valid, axis=1, out=counts[:, 1:])
+
+    sums = padded[:, 1:].copy()
+    totals = counts[:, 1:].copy()
+    sums[:, window:] -= padded[:, 1:-window]
+    totals[:, window:] -= counts[:, 1:-window]
+    return sums, totals
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean, NaN until a full window of observations (pandas min_periods=window)"""
+    sums, counts = _window_sums(values, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts == window, sums / window, np.nan)
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sample standard deviation over full windows"""
+    # Centre each row on its first observation to limit cancellation in the sum of squares
+    offset = np.zeros(values.shape[0])
+    if values.size:
+        first = np.argmax(~np.isnan(values), axis=1)
+        offset = np.nan_to_num(values[np.arange(values.shape[0]), first])
+    centred = values - offset[:, None]
+
+    sums, counts = _window_sums(centred, window)
+    squares, _ = _window_sums(centred * centred, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (squares - sums * sums / window) / (window - 1)
+    return np.where(counts == window, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Recursive EMA along the day axis, seeded at each row's first value (pandas adjust=False)"""
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(values)
+    state = np.full(values.shape[0], np.nan)
+    for day in range(values.shape[1]):
+        current = values[:, day]
+        state = np.where(np.isnan(state), current, state + alpha * (current - state))
+        out[:, day] = state
+    return out
+
+
+def compute_indicators(symbols: List[str], lengths: np.ndarray, close: np.ndarray) -> IndicatorMatrix:
+    """Compute every technical indicator for all symbols in one pass over the close matrix"""
+    valid = ~np.isnan(close)
+
+    delta = np.full_like(close, np.nan)
+    delta[:, 1:] = close[:, 1:] - close[:, :-1]
+    # Like Series.where(delta > 0, 0): the first bar's NaN delta counts as zero gain/loss
+    gain = np.where(valid, np.where(delta > 0, delta, 0.0), np.nan)
+    loss = np.where(valid, np.where(delta < 0, -delta, 0.0), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs = rolling_mean(gain, 14) / rolling_mean(loss, 14)
+        rsi = 100 - (100 / (1 + rs))
+
+    macd = ema(close, 12) - ema(close, 26)
+
+    return IndicatorMatrix(symbols, lengths, {
+        'SMA_20': rolling_mean(close, 20),
+        'SMA_50': rolling_mean(close, 50),
+        'SMA_200': rolling_mean(close, 200),
+        'RSI': rsi,
+        'MACD': macd,
+        'Signal_Line': ema(macd, 9),
+        'Volatility': rolling_std(close, 20),
+    })
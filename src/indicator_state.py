@@ -0,0 +1,215 @@
+import logging
+import math
+import os
+import pickle
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+SMA_WINDOWS = (20, 50, 200)
+RSI_WINDOW = 14
+VOLATILITY_WINDOW = 20
+
+
+def _ema_step(previous: Optional[float], value: float, span: int) -> float:
+    if previous is None:
+        return value
+    alpha = 2.0 / (span + 1)
+    return previous + alpha * (value - previous)
+
+
+def _naive_timestamp(timestamp) -> pd.Timestamp:
+    """Drop the timezone the way store_data_postgres does, keeping the wall-clock time"""
+    timestamp = pd.Timestamp(timestamp)
+    return timestamp.tz_localize(None) if timestamp.tzinfo else timestamp
+
+
+class SymbolIndicatorState:
+    """Running indicator state for one symbol, updated in O(1) per bar"""
+
+    def __init__(self):
+        self.last_timestamp: Optional[pd.Timestamp] = None
+        self.last_close: Optional[float] = None
+        self.bars = 0
+        self.windows = {window: deque(maxlen=window) for window in SMA_WINDOWS}
+        self.sums = {window: 0.0 for window in SMA_WINDOWS}
+        self.gains = deque(maxlen=RSI_WINDOW)
+        self.losses = deque(maxlen=RSI_WINDOW)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.ema_12: Optional[float] = None
+        self.ema_26: Optional[float] = None
+        self.signal: Optional[float] = None
+        # Close and EMAs from before the last bar, so that bar can be replaced when it is re-collected
+        self.previous: Optional[Tuple] = None
+
+    @staticmethod
+    def _push(buffer: deque, value: float) -> float:
+        """Append to a ring buffer and return the value that fell out (0 if none)"""
+        evicted = buffer[0] if len(buffer) == buffer.maxlen else 0.0
+        buffer.append(value)
+        return evicted
+
+    def update(self, timestamp, close: float) -> bool:
+        """Apply one bar; a bar at the last seen timestamp replaces it, earlier bars are ignored"""
+        timestamp = _naive_timestamp(timestamp)
+        if self.last_timestamp is not None and timestamp == self.last_timestamp:
+            return self._replace_last(close)
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            return False
+
+        self.previous = (self.last_close, self.ema_12, self.ema_26, self.signal)
+
+        for window in SMA_WINDOWS:
+            self.sums[window] += close - self._push(self.windows[window], close)
+
+        # The first bar has no delta and counts as zero gain and loss, as in the pandas path
+        delta = close - self.last_close if self.last_close is not None else 0.0
+        self.gain_sum += max(delta, 0.0) - self._push(self.gains, max(delta, 0.0))
+        self.loss_sum += max(-delta, 0.0) - self._push(self.losses, max(-delta, 0.0))
+
+        self.ema_12 = _ema_step(self.ema_12, close, 12)
+        self.ema_26 = _ema_step(self.ema_26, close, 26)
+        self.signal = _ema_step(self.signal, self.ema_12 - self.ema_26, 9)
+
+        self.last_timestamp = timestamp
+        self.last_close = close
+        self.bars += 1
+        if self.bars % 1000 == 0:
+            # Re-derive running sums now and then so float error cannot accumulate
+            self.sums = {window: math.fsum(self.windows[window]) for window in SMA_WINDOWS}
+            self.gain_sum = math.fsum(self.gains)
+            self.loss_sum = math.fsum(self.losses)
+        return True
+
+    def matches(self, timestamp, bars: int, close: float) -> bool:
+        """Whether this state has seen exactly the stored bars: same count, last timestamp and last close"""
+        return (
+            self.last_timestamp is not None and self.bars == bars and self.last_close == close
+            and self.last_timestamp == _naive_timestamp(timestamp)
+        )
+
+    def _replace_last(self, close: float) -> bool:
+        """Swap the last bar's close for a re-collected one, as today's bar moves until the close"""
+        # States pickled before replacement was supported have no previous values to rewind to
+        previous = getattr(self, 'previous', None)
+        if previous is None or close == self.last_close:
+            return False
+        previous_close, ema_12, ema_26, signal = previous
+
+        for window in SMA_WINDOWS:
+            self.sums[window] += close - self.windows[window][-1]
+            self.windows[window][-1] = close
+
+        delta = close - previous_close if previous_close is not None else 0.0
+        self.gain_sum += max(delta, 0.0) - self.gains[-1]
+        self.loss_sum += max(-delta, 0.0) - self.losses[-1]
+        self.gains[-1] = max(delta, 0.0)
+        self.losses[-1] = max(-delta, 0.0)
+
+        self.ema_12 = _ema_step(ema_12, close, 12)
+        self.ema_26 = _ema_step(ema_26, close, 26)
+        self.signal = _ema_step(signal, self.ema_12 - self.ema_26, 9)
+        self.last_close = close
+        return True
+
+    def indicators(self) -> Dict[str, float]:
+        """Return the latest indicator values (NaN until enough bars have been seen)"""
+        values = {}
+        for window in SMA_WINDOWS:
+            full = len(self.windows[window]) == window
+            values[f'SMA_{window}'] = self.sums[window] / window if full else math.nan
+
+        if len(self.gains) == RSI_WINDOW and self.loss_sum > 0:
+            values['RSI'] = 100 - 100 / (1 + self.gain_sum / self.loss_sum)
+        elif len(self.gains) == RSI_WINDOW and self.gain_sum > 0:
+            values['RSI'] = 100.0
+        else:
+            values['RSI'] = math.nan
+
+        values['MACD'] = self.ema_12 - self.ema_26 if self.ema_12 is not None else math.nan
+        values['Signal_Line'] = self.signal if self.signal is not None else math.nan
+
+        recent = list(self.windows[20])[-VOLATILITY_WINDOW:]
+        if len(recent) == VOLATILITY_WINDOW:
+            mean = math.fsum(recent) / VOLATILITY_WINDOW
+            variance = math.fsum((value - mean) ** 2 for value in recent) / (VOLATILITY_WINDOW - 1)
+            values['Volatility'] = math.sqrt(variance)
+        else:
+            values['Volatility'] = math.nan
+        return values
+
+
+class IndicatorStateStore:
+    """Per-symbol streaming indicator state shared by the collector and the analyzer"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.states: Dict[str, SymbolIndicatorState] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str) -> Optional[SymbolIndicatorState]:
+        return self.states.get(symbol)
+
+    def update(self, symbol: str, timestamp, close: float) -> bool:
+        with self._lock:
+            state = self.states.setdefault(symbol, SymbolIndicatorState())
+            return state.update(timestamp, close)
+
+    def update_frame(self, symbol: str, df: pd.DataFrame, close_column: str = 'Close', create: bool = True) -> int:
+        """Apply every bar in a timestamp-indexed frame; returns how many were new.
+
+        With create=False a symbol without state is left alone, so its state is later bootstrapped
+        from the full stored history rather than started from just these bars.
+        """
+        with self._lock:
+            if not create and symbol not in self.states:
+                return 0
+            state = self.states.setdefault(symbol, SymbolIndicatorState())
+            applied = 0
+            for timestamp, close in zip(df.index, df[close_column].to_numpy(dtype=float)):
+                applied += state.update(timestamp, close)
+        return applied
+
+    def reset(self, symbol: str):
+        """Forget a symbol's state so the next read replays its full history"""
+        with self._lock:
+            self.states.pop(symbol, None)
+
+    def bootstrap(self, history: Dict[str, pd.DataFrame]):
+        """Replay stored history for symbols that have no state yet"""
+        for symbol, df in history.items():
+            if symbol not in self.states and not df.empty:
+                self.update_frame(symbol, df.set_index('timestamp'), close_column='close')
+
+    def save(self, path: Optional[str] = None):
+        """Snapshot all states to disk atomically"""
+        path = path or self.path
+        if not path:
+            return
+        try:
+            with self._lock:
+                payload = pickle.dumps(self.states, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            self.logger.info(f"Saved indicator state for {len(self.states)} symbols to {path}")
+        except Exception as e:
+            self.logger.error(f"Error saving indicator state: {e}")
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> 'IndicatorStateStore':
+        """Restore a store from a snapshot, or start empty if there is none"""
+        store = cls(path)
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    store.states = pickle.load(f)
+                store.logger.info(f"Restored indicator state for {len(store.states)} symbols from {path}")
+            except Exception as e:
+                store.logger.error(f"Error restoring indicator state from {path}: {e}")
+        return store
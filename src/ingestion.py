@@ -0,0 +1,242 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from src.metrics import metrics
+
+
+def to_naive_nanos(timestamps) -> np.ndarray:
+    """Wall-clock timestamps as int64 epoch nanoseconds, matching what store_data_postgres wrote"""
+    index = pd.DatetimeIndex(timestamps)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[ns]').astype(np.int64)
+
+
+class IlpWriteError(Exception):
+    """An ILP write that failed after its first `flushed` rows were already sent"""
+
+    def __init__(self, flushed: int, error: Exception):
+        super().__init__(f"{error} (after {flushed} rows were flushed)")
+        self.flushed = flushed
+
+
+class BulkIngestor:
+    """Writes whole column batches through QuestDB's ILP sender, falling back to multi-row INSERTs"""
+
+    def __init__(self, pool, host: str = 'questdb', ilp_port: int = 9009, mode: str = 'ilp',
+                 batch_rows: int = 10000, max_retries: int = 3, retry_backoff: float = 0.5):
+        if mode not in ('ilp', 'pg'):
+            raise ValueError(f"Unknown ingestion mode: {mode}")
+        self.logger = logging.getLogger(__name__)
+        self.pool = pool
+        self.host = host
+        self.ilp_port = ilp_port
+        self.mode = mode
+        self.batch_rows = batch_rows
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # questdb.ingress.Sender, connected on first ILP write
+        self._sender = None
+
+    def _get_sender(self):
+        if self._sender is None:
+            import questdb.ingress as qi
+
+            # Flushing is driven by batch_rows so a failed batch can be resent as a whole
+            sender = qi.Sender(self.host, self.ilp_port, auto_flush=False)
+            sender.connect()
+            self._sender = sender
+        return self._sender
+
+    def _drop_sender(self):
+        if self._sender is not None:
+            try:
+                self._sender.close()
+            except Exception:
+                pass
+            self._sender = None
+
+    def close(self):
+        self._drop_sender()
+
+    def _flush_ilp(self, buffer):
+        import questdb.ingress as qi
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self._get_sender().flush(buffer, clear=False)
+                buffer.clear()
+                return
+            except qi.IngressError as e:
+                self._drop_sender()
+                if attempt == self.max_retries:
+                    raise
+                self.logger.warning(f"ILP flush failed (attempt {attempt}/{self.max_retries}): {e}")
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+    def wait_for_wal(self, tables: Sequence[str], timeout: float = 30.0, poll_interval: float = 0.2) -> bool:
+        """Block until rows committed to these WAL tables so far are applied and visible to queries.
+
+        WAL tables apply ILP and INSERT commits asynchronously, so a read straight after a write can
+        miss them. Returns False on timeout or when a table's WAL apply is suspended.
+        """
+        targets: Dict[str, int] = {}
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with self.pool.connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT name, suspended, writerTxn, sequencerTxn FROM wal_tables()")
+                    rows = cursor.fetchall()
+                    cursor.close()
+            except Exception as e:
+                self.logger.error(f"Could not read WAL status: {e}")
+                return False
+
+            pending = []
+            for name, suspended, writer_txn, sequencer_txn in rows:
+                if name not in tables:
+                    continue
+                if suspended:
+                    self.logger.error(f"WAL apply for {name} is suspended; new rows are not visible")
+                    return False
+                # Only wait for commits made before the first poll, not for later writers
+                target = targets.setdefault(name, sequencer_txn)
+                if writer_txn < target:
+                    pending.append(name)
+            if not pending:
+                return True
+            if time.monotonic() >= deadline:
+                self.logger.warning(f"WAL rows in {', '.join(pending)} not visible after {timeout}s")
+                return False
+            time.sleep(poll_interval)
+
+    def write_ilp(self, table: str, timestamps: np.ndarray, symbols: Dict[str, Sequence],
+                  columns: Dict[str, Sequence]) -> int:
+        """Send rows over the InfluxDB Line Protocol in batches of batch_rows.
+
+        Raises IlpWriteError with the count of rows already flushed, so a fallback resends only the rest.
+        """
+        import questdb.ingress as qi
+
+        symbol_values = {name: list(values) for name, values in symbols.items()}
+        column_values = {
+            name: values.tolist() if isinstance(values, np.ndarray) else list(values)
+            for name, values in columns.items()
+        }
+
+        buffer = qi.Buffer()
+        flushed = pending = 0
+        try:
+            for i, nanos in enumerate(timestamps.tolist()):
+                buffer.row(
+                    table,
+                    symbols={name: values[i] for name, values in symbol_values.items()},
+                    columns={name: values[i] for name, values in column_values.items()},
+                    at=qi.TimestampNanos(nanos)
+                )
+                pending += 1
+                if pending >= self.batch_rows:
+                    self._flush_ilp(buffer)
+                    flushed += pending
+                    pending = 0
+            if pending:
+                self._flush_ilp(buffer)
+        except Exception as e:
+            raise IlpWriteError(flushed, e) from e
+        return len(timestamps)
+
+    def write_pg(self, table: str, timestamps: np.ndarray, symbols: Dict[str, Sequence],
+                 columns: Dict[str, Sequence]) -> int:
+        """Insert rows over the PG wire with multi-row VALUES statements"""
+        names = ['timestamp'] + list(symbols) + list(columns)
+        epoch = datetime(1970, 1, 1)
+        stamps = [epoch + timedelta(microseconds=nanos // 1000) for nanos in timestamps.tolist()]
+        values = [
+            values.tolist() if isinstance(values, np.ndarray) else list(values)
+            for values in list(symbols.values()) + list(columns.values())
+        ]
+        rows = list(zip(stamps, *values))
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            execute_values(
+                cursor,
+                f"INSERT INTO {table} ({', '.join(names)}) VALUES %s",
+                rows,
+                page_size=self.batch_rows
+            )
+            cursor.close()
+        return len(rows)
+
+    def write(self, table: str, timestamps: np.ndarray, symbols: Dict[str, Sequence],
+              columns: Dict[str, Sequence], mode: Optional[str] = None) -> int:
+        """Write one batch of rows through the configured path; returns the row count"""
+        if len(timestamps) == 0:
+            return 0
+        flushed = 0
+        if (mode or self.mode) == 'ilp':
+            try:
+                with metrics.stage('db_insert'):
+                    written = self.write_ilp(table, timestamps, symbols, columns)
+                metrics.inc('rows_inserted_total', written, table=table, path='ilp')
+                return written
+            except Exception as e:
+                metrics.inc('ilp_fallbacks_total', table=table)
+                self.logger.error(f"ILP ingestion into {table} failed, falling back to INSERT: {e}")
+                # Flushed batches are stored; resending them would duplicate rows in tables without
+                # dedup keys (stock_news)
+                flushed = getattr(e, 'flushed', 0)
+                if flushed:
+                    metrics.inc('rows_inserted_total', flushed, table=table, path='ilp')
+                    timestamps = timestamps[flushed:]
+                    symbols = {name: values[flushed:] for name, values in symbols.items()}
+                    columns = {name: values[flushed:] for name, values in columns.items()}
+        with metrics.stage('db_insert'):
+            written = self.write_pg(table, timestamps, symbols, columns)
+        metrics.inc('rows_inserted_total', written, table=table, path='pg')
+        return flushed + written
+
+    def write_history(self, df: pd.DataFrame, table: str = 'stock_historical_data',
+                      mode: Optional[str] = None) -> int:
+        """Write a yfinance history frame (DatetimeIndex, Symbol/Open/High/Low/Close/Volume columns)"""
+        return self.write(
+            table,
+            to_naive_nanos(df.index),
+            {'symbol': df['Symbol'].astype(str).tolist()},
+            {
+                'open': df['Open'].to_numpy(dtype=np.float64),
+                'high': df['High'].to_numpy(dtype=np.float64),
+                'low': df['Low'].to_numpy(dtype=np.float64),
+                'close': df['Close'].to_numpy(dtype=np.float64),
+                'volume': df['Volume'].to_numpy(dtype=np.int64)
+            },
+            mode=mode
+        )
+
+    def write_news(self, symbol: str, news_items: List[Dict], timestamp: Optional[datetime] = None) -> int:
+        """Write news items for one symbol, all stamped with the same ingest time"""
+        return self.write_news_batch({symbol: news_items}, timestamp)
+
+    def write_news_batch(self, news: Dict[str, List[Dict]], timestamp: Optional[datetime] = None) -> int:
+        """Write news items for many symbols in one batch, all stamped with the same ingest time"""
+        rows = [(symbol, item) for symbol, items in news.items() for item in items]
+        if not rows:
+            return 0
+        timestamp = timestamp or datetime.now()
+        return self.write(
+            'stock_news',
+            to_naive_nanos([timestamp] * len(rows)),
+            {'symbol': [symbol for symbol, _ in rows]},
+            {
+                'title': [item['title'] for _, item in rows],
+                'description': [item.get('description') or '' for _, item in rows],
+                'sentiment': [float(item.get('sentiment') or 0) for _, item in rows]
+            }
+        )
@@ -0,0 +1,88 @@
+import asyncio
+import functools
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Optional
+
+
+class JobManager:
+    """Runs long tasks (e.g. data collection) in the background and tracks their status by id"""
+
+    def __init__(self, max_workers: int = 1, max_jobs: int = 100):
+        self.logger = logging.getLogger(__name__)
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _run(self, job: Dict, fn: Callable, args: tuple):
+        job['status'] = 'running'
+        job['started_at'] = datetime.utcnow()
+        try:
+            result = fn(*args)
+            job['result'] = result
+            job['status'] = 'succeeded'
+        except Exception as e:
+            self.logger.error(f"Job {job['id']} ({job['name']}) failed: {e}")
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            job['finished_at'] = datetime.utcnow()
+
+    def submit(self, name: str, fn: Callable, *args) -> Dict:
+        """Queue fn(*args); a job with the same name that is still pending is returned instead"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job['name'] == name and job['status'] in ('queued', 'running'):
+                    return job
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'name': name,
+                'status': 'queued',
+                'created_at': datetime.utcnow(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None
+            }
+            self._jobs[job['id']] = job
+            # Forget the oldest finished jobs beyond max_jobs
+            for job_id in list(self._jobs):
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                if self._jobs[job_id]['status'] in ('succeeded', 'failed'):
+                    del self._jobs[job_id]
+
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class RequestCoalescer:
+    """Runs blocking calls on an executor; concurrent calls with the same key share one result"""
+
+    def __init__(self, executor: Executor):
+        self.executor = executor
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, fn: Callable, *args):
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, functools.partial(fn, *args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled client does not cancel the shared computation
+        return await asyncio.shield(future)
@@ -0,0 +1,38 @@
+import threading
+from typing import Any, Callable
+
+
+class LazyObject:
+    """Stands in for the object factory() returns, building it on first attribute access.
+
+    Lets module-level components (and their heavy imports) be declared up front but only paid for
+    when a request, or a background warm-up, first touches them.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_wrapped', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _setup(self) -> Any:
+        if self._wrapped is None:
+            with self._lock:
+                if self._wrapped is None:
+                    object.__setattr__(self, '_wrapped', self._factory())
+        return self._wrapped
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._setup(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._setup(), name, value)
+
+    def __repr__(self) -> str:
+        if self._wrapped is None:
+            return f"<LazyObject {getattr(self._factory, '__name__', self._factory)} (not built)>"
+        return repr(self._wrapped)
+
+
+def is_built(obj: Any) -> bool:
+    """False only for a LazyObject whose factory has not run yet"""
+    return not isinstance(obj, LazyObject) or obj._wrapped is not None
@@ -0,0 +1,204 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.metrics import metrics
+
+PERIOD_DAYS = {'1d': 1, '5d': 5, '1mo': 30, '3mo': 90, '6mo': 180, '1y': 365, '2y': 730, '5y': 1825}
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class MarketDataSource:
+    """Interface for daily OHLCV providers; frames are indexed by timestamp with OHLCV columns"""
+
+    def fetch_history(self, symbols: List[str], period: str = "1mo", start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        raise NotImplementedError
+
+
+class YahooFinanceSource(MarketDataSource):
+    """Yahoo Finance via one multi-ticker yf.download call per batch"""
+
+    def fetch_history(self, symbols: List[str], period: str = "1mo", start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        import yfinance as yf
+
+        kwargs = {'start': start, 'end': end} if start is not None else {'period': period}
+        data = yf.download(
+            tickers=symbols,
+            group_by='ticker',
+            auto_adjust=True,
+            actions=False,
+            threads=False,
+            progress=False,
+            **kwargs
+        )
+        if data.empty:
+            return {}
+
+        frames = {}
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[symbol]
+            else:
+                frame = data
+            frame = frame[OHLCV_COLUMNS].dropna(how='all')
+            if not frame.empty:
+                frames[symbol] = frame.copy()
+        return frames
+
+
+class FakeMarketDataSource(MarketDataSource):
+    """Deterministic synthetic bars for tests and local runs without network access"""
+
+    def __init__(self, seed: int = 42, latency: float = 0.0, failure_rate: float = 0.0):
+        self.seed = seed
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def fetch_history(self, symbols: List[str], period: str = "1mo", start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and np.random.default_rng(self.seed + call).random() < self.failure_rate:
+            raise ConnectionError("simulated provider failure")
+
+        end = pd.Timestamp(end or datetime.now()).normalize()
+        start = pd.Timestamp(start) if start is not None else end - pd.Timedelta(days=PERIOD_DAYS.get(period, 30))
+        index = pd.bdate_range(start, end - pd.Timedelta(days=1))
+        # Bars are a pure function of (symbol, date) so overlapping ranges agree
+        days = np.asarray((index - pd.Timestamp('2000-01-03')).days, dtype=np.float64)
+
+        frames = {}
+        for symbol in symbols:
+            phase = (self.seed + sum(map(ord, symbol))) % 997
+            base = 100 + phase % 900
+            close = base * np.exp(0.05 * np.sin(days / 11.0 + phase) + 0.0002 * days)
+            noise = 0.005 * np.sin(days * 1.7 + phase)
+            frames[symbol] = pd.DataFrame({
+                'Open': close * (1 + noise),
+                'High': close * (1 + np.abs(noise) + 0.005),
+                'Low': close * (1 - np.abs(noise) - 0.005),
+                'Close': close,
+                'Volume': (1_000_000 + 400_000 * np.sin(days * 0.9 + phase)).astype(np.int64)
+            }, index=index)
+        return frames
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, bursting up to capacity"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until tokens are available, then take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_DONE = object()
+
+
+class ConcurrentFetcher:
+    """Fetches symbol batches on a bounded thread pool and hands frames to the caller through a queue"""
+
+    def __init__(self, source: MarketDataSource, max_workers: int = 4, batch_size: int = 20,
+                 rate: float = 2.0, max_retries: int = 3, retry_backoff: float = 1.0, queue_size: int = 64):
+        self.logger = logging.getLogger(__name__)
+        self.source = source
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.rate_limiter = TokenBucket(rate)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.queue_size = queue_size
+
+    def fetch_batch(self, symbols: List[str], **kwargs) -> Dict[str, pd.DataFrame]:
+        """Fetch one batch, retrying with exponential backoff; returns {} after the last failure"""
+        for attempt in range(1, self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                with metrics.stage('market_data_fetch'):
+                    history = self.source.fetch_history(symbols, **kwargs)
+                metrics.inc('rows_fetched_total', sum(len(df) for df in history.values()), source='market_data')
+                return history
+            except Exception as e:
+                metrics.inc('market_data_fetch_errors_total')
+                if attempt == self.max_retries:
+                    self.logger.error(f"Giving up on {symbols} after {attempt} attempts: {e}")
+                    return {}
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                self.logger.warning(f"Fetch of {len(symbols)} symbols failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return {}
+
+    def iter_history(self, symbols: List[str], **kwargs) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Yield (symbol, frame) as batches complete; fetching continues while the caller ingests"""
+        batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+        results: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stopped = threading.Event()
+
+        def put(item):
+            # Give up if the consumer went away, instead of blocking on a full queue forever
+            while not stopped.is_set():
+                try:
+                    results.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        def produce(batch: List[str]):
+            try:
+                if stopped.is_set():
+                    return
+                frames = self.fetch_batch(batch, **kwargs)
+                for symbol in batch:
+                    if symbol in frames:
+                        put((symbol, frames[symbol]))
+                    else:
+                        self.logger.warning(f"No data returned for {symbol}")
+            finally:
+                put(_DONE)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch')
+        try:
+            for batch in batches:
+                executor.submit(produce, batch)
+
+            remaining = len(batches)
+            while remaining:
+                item = results.get()
+                if item is _DONE:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            stopped.set()
+            executor.shutdown(wait=False)
@@ -0,0 +1,125 @@
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Tuple
+
+PREFIX = 'stockpick_'
+
+# Stage breakdown of the profiled call running in this context, if any
+_profile: contextvars.ContextVar = contextvars.ContextVar('metrics_profile', default=None)
+
+
+def _labels(labels: Dict) -> Tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and stage timers, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._gauges: Dict[str, Dict[Tuple, float]] = {}
+        # name -> labels -> [count, sum, max]
+        self._timers: Dict[str, Dict[Tuple, list]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add value to a counter"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Record one duration in a timer"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._timers.setdefault(name, {})
+            stats = series.setdefault(key, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Time a pipeline stage into stage_seconds and into the active profile, if any"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe('stage_seconds', elapsed, stage=stage)
+            breakdown = _profile.get()
+            if breakdown is not None:
+                entry = breakdown.setdefault(stage, {'seconds': 0.0, 'calls': 0})
+                entry['seconds'] += elapsed
+                entry['calls'] += 1
+
+    def timed(self, stage: str) -> Callable:
+        """Decorator form of stage()"""
+        def decorator(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def profile(self):
+        """Collect a per-stage breakdown of everything timed in this thread/context inside the block"""
+        breakdown: Dict[str, Dict] = {}
+        token = _profile.set(breakdown)
+        start = time.perf_counter()
+        try:
+            yield breakdown
+        finally:
+            _profile.reset(token)
+            breakdown['total'] = {'seconds': time.perf_counter() - start, 'calls': 1}
+
+    def render(self) -> str:
+        """All series in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                lines.extend(f"{PREFIX}{name}{_format_labels(key)} {value}" for key, value in series.items())
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {PREFIX}{name} gauge")
+                lines.extend(f"{PREFIX}{name}{_format_labels(key)} {value}" for key, value in series.items())
+            for name, series in sorted(self._timers.items()):
+                lines.append(f"# TYPE {PREFIX}{name} summary")
+                for key, (count, total, _) in series.items():
+                    lines.append(f"{PREFIX}{name}_count{_format_labels(key)} {count}")
+                    lines.append(f"{PREFIX}{name}_sum{_format_labels(key)} {total}")
+                lines.append(f"# TYPE {PREFIX}{name}_max gauge")
+                lines.extend(
+                    f"{PREFIX}{name}_max{_format_labels(key)} {stats[2]}" for key, stats in series.items()
+                )
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timers.clear()
+
+
+# Process-wide registry; worker processes keep their own, which /metrics does not see
+metrics = MetricsRegistry()
@@ -0,0 +1,112 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+class ModelRegistry:
+    """LRU cache of fitted (scaler, model) entries keyed by symbol, data watermark, features and hyperparameters"""
+
+    def __init__(self, max_entries: int = 256, cache_dir: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(symbol: str, watermark: Tuple, features: Tuple, params: Dict) -> Tuple:
+        return (symbol, tuple(str(mark) for mark in watermark), tuple(features), tuple(sorted(params.items())))
+
+    def _path(self, key: Tuple) -> str:
+        # One directory per symbol, so pruning one symbol cannot touch another whose name it prefixes
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, key[0], f"{digest}.pkl")
+
+    def _load(self, key: Tuple) -> Optional[Dict]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading cached model {path}: {e}")
+            return None
+
+    def _store(self, key: Tuple, entry: Dict):
+        path = self._path(key)
+        try:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            # Older watermarks for this symbol can never be hit again
+            for name in os.listdir(directory):
+                if name.endswith('.pkl') and os.path.join(directory, name) != path:
+                    os.remove(os.path.join(directory, name))
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.error(f"Error persisting model {path}: {e}")
+
+    def _remember(self, key: Tuple, entry: Dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if self.cache_dir:
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, entry)
+                return entry
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: Tuple, entry: Dict):
+        self._remember(key, entry)
+        if self.cache_dir:
+            self._store(key, entry)
+
+    def get_or_fit(self, key: Tuple, fit: Callable[[], Dict]) -> Dict:
+        """Return the cached entry for key, fitting and caching it on a miss"""
+        entry = self.get(key)
+        if entry is None:
+            entry = fit()
+            self.put(key, entry)
+        return entry
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,245 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.feature_names import RESULT_FEATURES
+
+SCORE_COLUMNS = ['predicted_return', 'technical_score', 'sentiment_score', 'overall_score']
+
+
+def _optional_float(value) -> Optional[float]:
+    """A float, or None for missing and NaN values (stored as NULL)"""
+    return None if value is None or value != value else float(value)
+
+
+class RankingSnapshot:
+    """Precomputed ranking of all symbols, refreshed incrementally in the background"""
+
+    def __init__(self, analyzer, refresh_interval: int = 300, persist: bool = False, follow: bool = False,
+                 retention_days: Optional[float] = 7):
+        self.logger = logging.getLogger(__name__)
+        self.analyzer = analyzer
+        self.refresh_interval = refresh_interval
+        self.persist = persist
+        # Persisted rankings older than this are dropped by partition; None keeps them all
+        self.retention_days = retention_days
+        # Reload the ranking another process persists (a standalone scheduler) instead of computing it
+        self.follow = follow
+        self.generated_at: Optional[datetime] = None
+        # Bumped only when the results change, so HTTP validators survive no-op refreshes
+        self.version = 0
+        self.modified_at: Optional[datetime] = None
+        self._results: Dict[str, Dict] = {}
+        self._watermarks: Dict[str, Tuple] = {}
+        self._ranking: List[Dict] = []
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Called with (ranking, generated_at) after every refresh or load, outside the lock
+        self._listeners: List[Callable[[List[Dict], Optional[datetime]], None]] = []
+
+    @property
+    def staleness_seconds(self) -> Optional[float]:
+        """Seconds since the current snapshot was generated"""
+        if self.generated_at is None:
+            return None
+        return (datetime.utcnow() - self.generated_at).total_seconds()
+
+    def add_listener(self, listener: Callable[[List[Dict], Optional[datetime]], None]):
+        """Call listener(ranking, generated_at) whenever a new ranking is installed"""
+        self._listeners.append(listener)
+
+    def _notify(self):
+        with self._lock:
+            ranking = list(self._ranking)
+            generated_at = self.generated_at
+        for listener in self._listeners:
+            try:
+                listener(ranking, generated_at)
+            except Exception as e:
+                self.logger.error(f"Error notifying ranking listener: {e}")
+
+    def top(self, n: int = 10) -> List[Dict]:
+        """Return the n best ranked symbols from the current snapshot"""
+        with self._lock:
+            return self._ranking[:n]
+
+    def ranking(self) -> List[Dict]:
+        """Every ranked symbol, best first"""
+        with self._lock:
+            return list(self._ranking)
+
+    def results_for(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Current results of the given symbols that are in the snapshot"""
+        with self._lock:
+            return {symbol: self._results[symbol] for symbol in symbols if symbol in self._results}
+
+    def refresh(self) -> int:
+        """Recompute symbols whose data changed since the last run (reload when following); returns how many"""
+        if self.follow:
+            return self.reload()
+        with self._refresh_lock:
+            watermarks = self.analyzer.get_data_watermarks()
+            changed = [
+                symbol for symbol, marks in watermarks.items()
+                if self._watermarks.get(symbol) != marks
+            ]
+            if changed and self.analyzer.prediction_mode == 'pooled':
+                # A pooled model couples every symbol's prediction, so rescore them all
+                changed = list(watermarks)
+            self.logger.info(f"Refreshing ranking snapshot: {len(changed)}/{len(watermarks)} symbols changed")
+
+            fresh = {result['symbol']: result for result in self.analyzer.analyze_symbols(changed)} if changed else {}
+
+            fresh_symbols = set(changed)
+            with self._lock:
+                results = {
+                    symbol: result for symbol, result in self._results.items()
+                    if symbol in watermarks and symbol not in fresh_symbols
+                }
+                results.update(fresh)
+                changed_results = results != self._results
+                # Symbols that failed keep no watermark so they are retried next run
+                self._watermarks = {
+                    symbol: marks for symbol, marks in watermarks.items()
+                    if symbol in results
+                }
+                self._results = results
+                self._ranking = self.analyzer.rank(list(results.values()))
+                self.generated_at = datetime.utcnow()
+                if changed_results or self.modified_at is None:
+                    self.version += 1
+                    self.modified_at = self.generated_at
+
+            if self.persist and changed_results:
+                self.store_snapshot()
+            self._notify()
+            return len(changed)
+
+    def store_snapshot(self):
+        """Persist the current ranking into stock_rankings in one bulk write, then prune old partitions"""
+        # Imported here so the API can import the snapshot without pandas
+        from src.ingestion import BulkIngestor, to_naive_nanos
+
+        try:
+            with self._lock:
+                ranking = list(self._ranking)
+                generated_at = self.generated_at
+            if not ranking:
+                return
+
+            # INSERTs rather than ILP, so a following API never sees the ranking half written
+            ingestor = BulkIngestor(self.analyzer.pool, mode='pg')
+            stored = ingestor.write(
+                'stock_rankings',
+                to_naive_nanos([generated_at] * len(ranking)),
+                {'symbol': [result['symbol'] for result in ranking]},
+                dict(
+                    {'rank': list(range(1, len(ranking) + 1))},
+                    **{name: [float(result[name]) for result in ranking] for name in SCORE_COLUMNS},
+                    # Features too, so a following API can still screen on them
+                    **{name: [_optional_float(result.get(name)) for result in ranking] for name in RESULT_FEATURES}
+                )
+            )
+            self.logger.info(f"Persisted ranking snapshot with {stored} symbols")
+        except Exception as e:
+            self.logger.error(f"Error persisting ranking snapshot: {e}")
+            return
+
+        if self.retention_days:
+            # Counted back from the ranking just written, so the latest one is never dropped
+            cutoff = generated_at - timedelta(days=self.retention_days)
+            try:
+                with self.analyzer.pool.connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        "ALTER TABLE stock_rankings DROP PARTITION WHERE timestamp < %s", (cutoff,)
+                    )
+                    cursor.close()
+            except Exception as e:
+                self.logger.warning(f"Could not prune ranking snapshots before {cutoff}: {e}")
+
+    def load_snapshot(self) -> bool:
+        """Seed the in-memory ranking from the last persisted snapshot"""
+        try:
+            with self.analyzer.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT max(timestamp) FROM stock_rankings")
+                latest = cursor.fetchone()[0]
+                rows = []
+                if latest is not None:
+                    # Every row of one ranking shares its timestamp
+                    cursor.execute(
+                        f"SELECT timestamp, symbol, {', '.join(SCORE_COLUMNS + RESULT_FEATURES)} "
+                        "FROM stock_rankings WHERE timestamp = %s",
+                        (latest,)
+                    )
+                    rows = cursor.fetchall()
+                cursor.close()
+        except Exception as e:
+            self.logger.error(f"Error loading persisted ranking snapshot: {e}")
+            return False
+
+        if not rows:
+            return False
+
+        results = {
+            row[1]: dict(
+                {'symbol': row[1]},
+                **dict(zip(SCORE_COLUMNS, row[2:])),
+                **{name: _optional_float(value) for name, value in zip(RESULT_FEATURES, row[2 + len(SCORE_COLUMNS):])}
+            )
+            for row in rows
+        }
+        with self._lock:
+            # Watermarks stay empty so the next refresh recomputes everything
+            self._results = results
+            self._ranking = self.analyzer.rank(list(results.values()))
+            self.generated_at = max(row[0] for row in rows)
+            self.version += 1
+            self.modified_at = self.generated_at
+        self.logger.info(f"Loaded persisted ranking snapshot with {len(rows)} symbols")
+        self._notify()
+        return True
+
+    def reload(self) -> int:
+        """Load the persisted ranking if it is newer than the current one; returns how many symbols it has"""
+        with self._refresh_lock:
+            try:
+                with self.analyzer.pool.connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT max(timestamp) FROM stock_rankings")
+                    latest = cursor.fetchone()[0]
+                    cursor.close()
+            except Exception as e:
+                self.logger.error(f"Error checking the persisted ranking snapshot: {e}")
+                return 0
+            if latest is None or (self.generated_at is not None and latest <= self.generated_at):
+                return 0
+            return len(self._results) if self.load_snapshot() else 0
+
+    def _run(self, delay: float):
+        if self._stop.wait(delay):
+            return
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.logger.error(f"Error refreshing ranking snapshot: {e}")
+            self._stop.wait(self.refresh_interval)
+
+    def start(self, delay: float = 0):
+        """Start the background refresh thread, first refreshing after delay seconds"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(delay,), name="ranking-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
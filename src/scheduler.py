@@ -0,0 +1,221 @@
+import functools
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: runs are only serialized within one process
+    fcntl = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.metrics import metrics
+
+# NSE cash market: 09:15-15:30 IST, Monday to Friday (IST has no DST, so a fixed offset is exact)
+IST = timezone(timedelta(hours=5, minutes=30), 'IST')
+MARKET_OPEN = dt_time(9, 15)
+MARKET_CLOSE = dt_time(15, 30)
+
+
+def is_trading_day(day) -> bool:
+    """Weekdays only; exchange holidays are not modelled"""
+    return day.weekday() < 5
+
+
+def is_market_open(now: datetime) -> bool:
+    now = now.astimezone(IST)
+    return is_trading_day(now) and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def next_market_open(now: datetime) -> datetime:
+    """The next session open strictly after now"""
+    now = now.astimezone(IST)
+    day = now.date()
+    while True:
+        candidate = datetime.combine(day, MARKET_OPEN, tzinfo=IST)
+        if candidate > now and is_trading_day(candidate):
+            return candidate
+        day += timedelta(days=1)
+
+
+class RunLock:
+    """Non-blocking lock that keeps collection runs from overlapping, across processes when given a path"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def acquire(self) -> bool:
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        if self.path and fcntl is not None:
+            handle = open(self.path, 'a')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                self._thread_lock.release()
+                return False
+            self._file = handle
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+class CollectionScheduler:
+    """Runs incremental collection on a cadence aligned to NSE hours, then refreshes the ranking"""
+
+    def __init__(self, collect: Callable[[], Dict], on_complete: Optional[Callable[[], object]] = None,
+                 market_interval: int = 900, off_hours_interval: int = 0, settle_delay: int = 900,
+                 lock: Optional[RunLock] = None):
+        self.logger = logging.getLogger(__name__)
+        self.collect = collect
+        self.on_complete = on_complete
+        # Seconds between runs while the market is open
+        self.market_interval = market_interval
+        # Seconds between runs while closed; 0 runs once after the close and then waits for the next open
+        self.off_hours_interval = off_hours_interval
+        # Delay after the close before the end-of-day run, so final bars have settled upstream
+        self.settle_delay = settle_delay
+        self.lock = lock or RunLock()
+        self.last_run: Optional[datetime] = None
+        self.last_result: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def next_run(self, now: Optional[datetime] = None) -> datetime:
+        """When the next run is due, given the last run"""
+        now = (now or datetime.now(IST)).astimezone(IST)
+        last = self.last_run.astimezone(IST) if self.last_run else None
+
+        if is_market_open(now):
+            return now if last is None else max(now, last + timedelta(seconds=self.market_interval))
+
+        # End-of-day run once the last session's bars have settled
+        session_day = now.date() if now.time() >= MARKET_CLOSE else now.date() - timedelta(days=1)
+        while not is_trading_day(session_day):
+            session_day -= timedelta(days=1)
+        settled = datetime.combine(session_day, MARKET_CLOSE, tzinfo=IST) + timedelta(seconds=self.settle_delay)
+        if last is None or last < settled:
+            return max(now, settled)
+
+        if self.off_hours_interval:
+            return max(now, last + timedelta(seconds=self.off_hours_interval))
+        return next_market_open(now)
+
+    def run_once(self) -> Dict:
+        """Collect, then refresh the ranking; skipped if another run holds the lock"""
+        if not self.lock.acquire():
+            self.logger.info("Collection already running, skipping")
+            metrics.inc('scheduled_runs_total', result='skipped')
+            # Count the other run as ours so the loop waits a full interval instead of spinning
+            self.last_run = datetime.now(IST)
+            return {'skipped': True}
+
+        try:
+            self.last_run = datetime.now(IST)
+            result = dict(self.collect() or {})
+            if self.on_complete is not None:
+                result['refreshed'] = self.on_complete()
+            self.last_result = result
+            metrics.inc('scheduled_runs_total', result='failed' if result.get('error') else 'succeeded')
+            return result
+        finally:
+            self.lock.release()
+
+    def run_forever(self):
+        """Run the schedule in the calling thread until stop()"""
+        self._loop()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            delay = (self.next_run() - datetime.now(IST)).total_seconds()
+            # Wake at least hourly so clock changes or suspends do not leave the loop asleep
+            if delay > 0 and self._stop.wait(min(delay, 3600)):
+                break
+            if delay > 3600:
+                continue
+            try:
+                self.run_once()
+            except Exception as e:
+                self.logger.error(f"Scheduled collection failed: {e}")
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='collection-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def status(self) -> Dict:
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'market_open': is_market_open(datetime.now(IST)),
+            'last_run': self.last_run,
+            'last_result': self.last_result,
+            'next_run': self.next_run() if self._thread is not None else None
+        }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    from src.db_pool import ConnectionPool
+    from src.ranking_snapshot import RankingSnapshot
+    from src.stock_analyzer import StockAnalyzer
+    from src.stock_data_collector import StockDataCollector
+
+    questdb_host = os.getenv('QUESTDB_HOST', 'questdb')
+    questdb_port = int(os.getenv('QUESTDB_PORT', '8812'))
+    pool = ConnectionPool(questdb_host, questdb_port, maxconn=4)
+    collector = StockDataCollector(
+        db_host=questdb_host,
+        db_port=questdb_port,
+        ilp_port=int(os.getenv('QUESTDB_ILP_PORT', '9009')),
+        ingestion_mode=os.getenv('INGESTION_MODE', 'ilp'),
+        pool=pool,
+        symbols=[s for s in os.getenv('COLLECTOR_SYMBOLS', '').split(',') if s] or None,
+        wal_visibility_timeout=float(os.getenv('WAL_VISIBILITY_TIMEOUT', '30'))
+    )
+    analyzer = StockAnalyzer(db_host=questdb_host, db_port=questdb_port, pool=pool)
+    # Persisted for the API (a separate process here), which reloads it with RANKING_SOURCE=persisted
+    snapshot = RankingSnapshot(
+        analyzer, refresh_interval=0, persist=True,
+        retention_days=float(os.getenv('RANKING_RETENTION_DAYS', '7')) or None
+    )
+
+    max_symbols = int(os.getenv('COLLECTOR_MAX_SYMBOLS', '0')) or None
+    scheduler = CollectionScheduler(
+        functools.partial(collector.collect_all_data, max_symbols=max_symbols),
+        on_complete=snapshot.refresh,
+        market_interval=int(os.getenv('SCHEDULER_MARKET_INTERVAL', '900')),
+        off_hours_interval=int(os.getenv('SCHEDULER_OFF_HOURS_INTERVAL', '0')),
+        settle_delay=int(os.getenv('SCHEDULER_SETTLE_DELAY', '900')),
+        lock=RunLock(os.getenv('COLLECTION_LOCK_PATH', '/tmp/stock-collection.lock'))
+    )
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        analyzer.close()
+        pool.close()
@@ -0,0 +1,85 @@
+import base64
+import bisect
+import json
+import operator
+import re
+from typing import Dict, List, Optional, Tuple
+
+from src.feature_names import RESULT_FEATURES
+
+SCORE_FIELDS = ['rank', 'predicted_return', 'technical_score', 'sentiment_score', 'overall_score']
+SCREEN_FIELDS = SCORE_FIELDS + RESULT_FEATURES
+
+OPERATORS = {
+    '>=': operator.ge,
+    '<=': operator.le,
+    '!=': operator.ne,
+    '==': operator.eq,
+    '>': operator.gt,
+    '<': operator.lt,
+    '=': operator.eq
+}
+FILTER_PATTERN = re.compile(r'^\s*(\w+)\s*(>=|<=|!=|==|>|<|=)\s*(\S+)\s*$')
+
+
+def parse_filter(expression: str) -> Tuple[str, str, float]:
+    """Parse 'RSI>=30' into (field, operator, value); raises ValueError on anything else"""
+    match = FILTER_PATTERN.match(expression)
+    if not match:
+        raise ValueError(f"Invalid filter {expression!r}; expected e.g. RSI>=30")
+    field, op, value = match.groups()
+    if field not in SCREEN_FIELDS:
+        raise ValueError(f"Unknown filter field {field!r}")
+    try:
+        return field, op, float(value)
+    except ValueError:
+        raise ValueError(f"Filter value must be a number: {expression!r}")
+
+
+def encode_cursor(key: Tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        missing, value, symbol = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return bool(missing), float(value), str(symbol)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def screen(ranking: List[Dict], filters: List[str], sort: str = 'overall_score', descending: bool = True,
+           limit: int = 50, cursor: Optional[str] = None) -> Dict:
+    """Filter, sort and page ranked results with a keyset cursor.
+
+    Pages are keyed on (sort value, symbol) rather than offsets, so a refresh between requests
+    neither repeats nor skips rows that kept their place. Rows missing the sort field come last.
+    """
+    if sort not in SCREEN_FIELDS:
+        raise ValueError(f"Unknown sort field {sort!r}")
+    conditions = [parse_filter(expression) for expression in filters]
+
+    rows = []
+    for rank, result in enumerate(ranking, start=1):
+        row = {'symbol': result['symbol']}
+        row.update((field, rank if field == 'rank' else result.get(field)) for field in SCREEN_FIELDS)
+        if all(row[field] is not None and OPERATORS[op](row[field], value) for field, op, value in conditions):
+            rows.append(row)
+
+    def key(row: Dict) -> Tuple:
+        value = row[sort]
+        if value is None:
+            return True, 0.0, row['symbol']
+        return False, -value if descending else value, row['symbol']
+
+    rows.sort(key=key)
+    keys = [key(row) for row in rows]
+    start = bisect.bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+    page = rows[start:start + limit]
+    more = start + limit < len(rows)
+    return {
+        'total': len(rows),
+        'stocks': page,
+        'next_cursor': encode_cursor(keys[start + limit - 1]) if more else None
+    }
@@ -0,0 +1,80 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+from src.metrics import metrics
+
+
+def news_text(item: Dict) -> str:
+    """Title and description of a news item as one string (description may be missing or None)"""
+    return f"{item.get('title') or ''} {item.get('description') or ''}".strip()
+
+
+class SentimentScorer:
+    """Scores news polarity with TextBlob, memoizing each distinct text in a bounded LRU keyed by content hash"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Keyed by digest rather than text so long descriptions do not count against memory twice
+        self._scores: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def score(self, item: Dict) -> float:
+        return self.score_batch([item])[0]
+
+    def score_batch(self, items: List[Dict]) -> List[float]:
+        """Polarity per item; each distinct text not already cached is parsed exactly once"""
+        digests = [self.content_hash(news_text(item)) for item in items]
+        texts = {digest: news_text(item) for digest, item in zip(digests, items)}
+
+        scores = {}
+        with self._lock:
+            for digest in texts:
+                if digest in self._scores:
+                    self._scores.move_to_end(digest)
+                    scores[digest] = self._scores[digest]
+            self.hits += len(scores)
+
+        missing = [digest for digest in texts if digest not in scores]
+        if missing:
+            # Imported on first use: textblob pulls in nltk and takes seconds to load
+            from textblob import TextBlob
+        with metrics.stage('sentiment_scoring'):
+            for digest in missing:
+                try:
+                    scores[digest] = float(TextBlob(texts[digest]).sentiment.polarity)
+                except Exception as e:
+                    self.logger.error(f"Error scoring news text: {e}")
+                    scores[digest] = 0.0
+        metrics.inc('sentiment_texts_total', len(scores) - len(missing), result='cached')
+        metrics.inc('sentiment_texts_total', len(missing), result='scored')
+
+        with self._lock:
+            self.misses += len(missing)
+            for digest in missing:
+                self._scores[digest] = scores[digest]
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+                self.evictions += 1
+
+        return [scores[digest] for digest in digests]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._scores),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,142 @@
+import logging
+import math
+from typing import Dict, List, Optional
+
+from src.data_loader import _quote
+from src.feature_names import RESULT_FEATURES
+from src.indicator_state import RSI_WINDOW, SMA_WINDOWS, VOLATILITY_WINDOW
+from src.metrics import metrics
+
+# One compact row per symbol
+FEATURE_NAMES = RESULT_FEATURES + ['sentiment']
+VOLUME_WINDOW = 20
+
+
+def _window(rows: int) -> str:
+    return f"OVER (PARTITION BY symbol ORDER BY timestamp ROWS BETWEEN {rows - 1} PRECEDING AND CURRENT ROW)"
+
+
+def _value(value) -> float:
+    return math.nan if value is None else float(value)
+
+
+def finish_features(bars: int, close: float, volume: float, sma: Dict[int, float], close_sq: float,
+                    avg_gain: float, avg_loss: float, avg_volume: float, sentiment: float) -> Dict[str, float]:
+    """Turn windowed averages into the indicator values the pandas path computes from full frames"""
+    features = {'close': close, 'volume': volume}
+    for window in SMA_WINDOWS:
+        features[f'SMA_{window}'] = sma[window] if bars >= window else math.nan
+
+    if bars > RSI_WINDOW - 1 and avg_loss > 0:
+        features['RSI'] = 100 - 100 / (1 + avg_gain / avg_loss)
+    elif bars > RSI_WINDOW - 1 and avg_gain > 0:
+        features['RSI'] = 100.0
+    else:
+        features['RSI'] = math.nan
+
+    if bars >= VOLATILITY_WINDOW:
+        # Sample standard deviation from E[x^2] - E[x]^2, clamped against rounding below zero
+        mean = sma[VOLATILITY_WINDOW]
+        variance = max(close_sq - mean * mean, 0.0) * VOLATILITY_WINDOW / (VOLATILITY_WINDOW - 1)
+        features['Volatility'] = math.sqrt(variance)
+    else:
+        features['Volatility'] = math.nan
+
+    features['avg_volume_20'] = avg_volume if bars >= VOLUME_WINDOW else math.nan
+    features['volume_ratio'] = (
+        volume / avg_volume if bars >= VOLUME_WINDOW and avg_volume else math.nan
+    )
+    features['sentiment'] = sentiment
+    return features
+
+
+class SqlFeatureProvider:
+    """Computes each symbol's latest indicator and volume features inside QuestDB.
+
+    Daily bars come from SAMPLE BY, moving averages and RSI gains/losses from window functions over
+    them, and the latest bar from LATEST ON, so one row per symbol crosses the wire instead of its
+    whole history.
+    """
+
+    def __init__(self, pool, loader, lookback_days: int = 400, half_life_days: Optional[float] = None):
+        self.logger = logging.getLogger(__name__)
+        self.pool = pool
+        # Sentiment reuses the loader's aggregation query
+        self.loader = loader
+        # Calendar days scanned; enough for SMA_200's 200 trading days
+        self.lookback_days = lookback_days
+        self.half_life_days = half_life_days
+
+    def _conditions(self, symbols: Optional[List[str]], lookback: bool) -> str:
+        conditions = []
+        if lookback:
+            conditions.append(f"timestamp >= dateadd('d', -{int(self.lookback_days)}, now())")
+        if symbols is not None:
+            conditions.append(f"symbol IN ({', '.join(_quote(s) for s in symbols)})")
+        return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    def _latest_query(self, symbols: Optional[List[str]]) -> str:
+        return (
+            f"SELECT symbol, close, volume FROM stock_historical_data{self._conditions(symbols, False)}"
+            " LATEST ON timestamp PARTITION BY symbol"
+        )
+
+    def _window_query(self, symbols: Optional[List[str]]) -> str:
+        smas = ",\n                   ".join(
+            f"avg(close) {_window(window)} sma_{window}" for window in SMA_WINDOWS
+        )
+        return f"""
+        SELECT symbol, bars, {', '.join(f'sma_{window}' for window in SMA_WINDOWS)},
+               close_sq, avg_gain, avg_loss, avg_volume
+        FROM (
+            SELECT symbol,
+                   count() {_window(max(SMA_WINDOWS))} bars,
+                   {smas},
+                   avg(close * close) {_window(VOLATILITY_WINDOW)} close_sq,
+                   avg(gain) {_window(RSI_WINDOW)} avg_gain,
+                   avg(loss) {_window(RSI_WINDOW)} avg_loss,
+                   avg(volume) {_window(VOLUME_WINDOW)} avg_volume,
+                   row_number() OVER (PARTITION BY symbol ORDER BY timestamp DESC) recency
+            FROM (
+                SELECT symbol, timestamp, close, volume,
+                       CASE WHEN delta > 0 THEN delta ELSE 0.0 END gain,
+                       CASE WHEN delta < 0 THEN -delta ELSE 0.0 END loss
+                FROM (
+                    SELECT symbol, timestamp, close, volume,
+                           close - lag(close) OVER (PARTITION BY symbol ORDER BY timestamp) delta
+                    FROM (
+                        SELECT timestamp, symbol, last(close) close, sum(volume) volume
+                        FROM stock_historical_data{self._conditions(symbols, True)}
+                        SAMPLE BY 1d
+                    )
+                )
+            )
+        )
+        WHERE recency = 1
+        """
+
+    def load_features(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """Latest features per symbol (all symbols when None), keyed by symbol"""
+        with metrics.stage('db_fetch_features'):
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(self._latest_query(symbols))
+                latest = {row[0]: row[1:] for row in cursor.fetchall()}
+                cursor.execute(self._window_query(symbols))
+                windows = {row[0]: row[1:] for row in cursor.fetchall()}
+                cursor.close()
+            sentiment = self.loader.load_sentiment(symbols, half_life_days=self.half_life_days)
+        metrics.inc('rows_fetched_total', len(latest) + len(windows), source='sql_features')
+
+        features = {}
+        for symbol, (close, volume) in latest.items():
+            if symbol not in windows:
+                continue
+            bars, *rest = windows[symbol]
+            smas = dict(zip(SMA_WINDOWS, (_value(value) for value in rest[:len(SMA_WINDOWS)])))
+            close_sq, avg_gain, avg_loss, avg_volume = (_value(value) for value in rest[len(SMA_WINDOWS):])
+            features[symbol] = finish_features(
+                int(bars or 0), _value(close), _value(volume), smas, close_sq,
+                avg_gain, avg_loss, avg_volume, sentiment.get(symbol, 0.0)
+            )
+        return features
@@ -1,127 +1,364 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
-import questdb
-from typing import List, Dict
+from typing import Callable, List, Dict, Tuple, Optional
 import logging
-from textblob import TextBlob
-import psycopg2
+import multiprocessing
+import hashlib
+from datetime import datetime, timedelta
+import signal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from src.data_loader import BulkDataLoader
+from src.history_cache import HistoryCache, CachedHistoryLoader
+from src.db_pool import ConnectionPool
+from src.indicator_engine import build_close_matrix, compute_indicators
+from src.indicator_state import IndicatorStateStore
+from src.model_registry import ModelRegistry
+from src.universe import UniverseStore
+from src.sentiment import SentimentScorer
+from src.feature_names import BAR_FEATURES
+from src.sql_features import FEATURE_NAMES, VOLUME_WINDOW, SqlFeatureProvider
+from src.metrics import metrics
+
+FEATURES = [
+    'SMA_20', 'SMA_50', 'SMA_200', 'RSI', 'MACD', 'Signal_Line',
+    'Volatility', 'volume'
+]
+MODEL_PARAMS = {'n_estimators': 100, 'random_state': 42}
+PRICE_FEATURES = ['SMA_20', 'SMA_50', 'SMA_200', 'MACD', 'Signal_Line', 'Volatility']
+
+# Analyzer owned by each pool worker process, with its own DB connection
+_worker_analyzer = None
+
+def _init_worker(config: Dict):
+    global _worker_analyzer
+    _worker_analyzer = StockAnalyzer(**config)
+
+@contextmanager
+def _symbol_timeout(seconds: float):
+    """Raise TimeoutError if the block runs longer than seconds (worker main thread only)"""
+    if not seconds or not hasattr(signal, 'SIGALRM'):
+        yield
+        return
+
+    def _on_timeout(signum, frame):
+        raise TimeoutError(f"analysis exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def bar_watermark(hist_data: pd.DataFrame) -> Tuple:
+    """What identifies a symbol's bars for caching: the last timestamp, the row count, and the last
+    close and volume, which change when today's bar is rewritten"""
+    last = hist_data.iloc[-1]
+    return last['timestamp'], len(hist_data), float(last['close']), float(last['volume'])
+
+def _analyze_chunk(symbols: List[str], symbol_timeout: float) -> List[Dict]:
+    """Analyze a batch of symbols inside a pool worker"""
+    get_frame, sentiment = _worker_analyzer.load_batch(symbols)
+    results = []
+    for symbol in symbols:
+        try:
+            with _symbol_timeout(symbol_timeout):
+                analysis = _worker_analyzer.analyze_frame(
+                    symbol, get_frame(symbol), sentiment.get(symbol, 0.0), indicators_ready=True
+                )
+        except TimeoutError as e:
+            # analyze_frame reports its own timeouts; this catches the alarm while the frame is built
+            metrics.inc('symbols_analyzed_total', result='timeout')
+            _worker_analyzer.logger.error(f"Timed out analyzing {symbol}: {e}")
+            continue
+        if analysis:
+            results.append(analysis)
+    return results
 
 class StockAnalyzer:
-    def __init__(self, db_host: str = 'questdb', db_port: int = 8812):
+    def __init__(self, db_host: str = 'questdb', db_port: int = 8812, workers: int = 1,
+                 chunk_size: int = 8, symbol_timeout: float = 120,
+                 history_days: Optional[int] = None, http_url: Optional[str] = None,
+                 indicator_state: Optional[IndicatorStateStore] = None,
+                 model_cache_size: int = 256, model_cache_dir: Optional[str] = None,
+                 prediction_mode: str = 'per_symbol', model_jobs: int = -1,
+                 pool: Optional[ConnectionPool] = None,
+                 sentiment_half_life_days: Optional[float] = None, sentiment_cache_size: int = 10000,
+                 loader: Optional[BulkDataLoader] = None, history_cache_dir: Optional[str] = None,
+                 universe_dtype: Optional[str] = None, feature_source: str = 'pandas'):
         self.logger = logging.getLogger(__name__)
         self.db_host = db_host
         self.db_port = db_port
-        self.conn = psycopg2.connect(
-            dbname='qdb',
-            user='admin',
-            password='quest',
-            host=db_host,
-            port=db_port
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.symbol_timeout = symbol_timeout
+        self.history_days = history_days
+        self.http_url = http_url
+        self.indicator_state = indicator_state
+        if prediction_mode not in ('per_symbol', 'pooled'):
+            raise ValueError(f"Unknown prediction mode: {prediction_mode}")
+        self.prediction_mode = prediction_mode
+        if feature_source not in ('pandas', 'sql'):
+            raise ValueError(f"Unknown feature source: {feature_source}")
+        self.feature_source = feature_source
+        self.model_jobs = model_jobs
+        self.model_registry = ModelRegistry(max_entries=model_cache_size, cache_dir=model_cache_dir)
+        # None or 0 weights all stored news equally
+        self.sentiment_half_life_days = sentiment_half_life_days
+        self.sentiment = SentimentScorer(max_entries=sentiment_cache_size)
+        # 'float64' or 'float32' holds loaded batches in a compact UniverseStore instead of per-symbol frames;
+        # each symbol is still analyzed from a float64 frame built from the store on demand
+        self.universe_dtype = universe_dtype
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Connections open lazily, so the analyzer can be built while QuestDB is down
+        self.pool = pool or ConnectionPool(db_host, db_port)
+        # Anything with the BulkDataLoader methods works, e.g. an in-memory stand-in for benchmarks
+        self.loader = loader or BulkDataLoader(self.pool, http_url=http_url)
+        # Memory-mapped history files; worker processes map the same files instead of re-querying
+        self.history_cache = HistoryCache(history_cache_dir) if history_cache_dir else None
+        if self.history_cache is not None:
+            self.loader = CachedHistoryLoader(self.history_cache, self.loader)
+        # 'sql' computes latest features inside QuestDB instead of from loaded history frames
+        self.sql_features = (
+            SqlFeatureProvider(self.pool, self.loader, half_life_days=sentiment_half_life_days)
+            if feature_source == 'sql' else None
         )
-        self.scaler = StandardScaler()
         
+    @metrics.timed('indicators')
     def calculate_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate technical indicators for analysis"""
         # Moving averages
-        df['SMA_20'] = df['Close'].rolling(window=20).mean()
-        df['SMA_50'] = df['Close'].rolling(window=50).mean()
-        df['SMA_200'] = df['Close'].rolling(window=200).mean()
+        df['SMA_20'] = df['close'].rolling(window=20).mean()
+        df['SMA_50'] = df['close'].rolling(window=50).mean()
+        df['SMA_200'] = df['close'].rolling(window=200).mean()
         
         # RSI
-        delta = df['Close'].diff()
+        delta = df['close'].diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
         rs = gain / loss
         df['RSI'] = 100 - (100 / (1 + rs))
         
         # MACD
-        exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['Close'].ewm(span=26, adjust=False).mean()
+        exp1 = df['close'].ewm(span=12, adjust=False).mean()
+        exp2 = df['close'].ewm(span=26, adjust=False).mean()
         df['MACD'] = exp1 - exp2
         df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
         
         # Volatility
-        df['Volatility'] = df['Close'].rolling(window=20).std()
+        df['Volatility'] = df['close'].rolling(window=20).std()
         
         return df
 
+    @metrics.timed('indicators')
+    def calculate_technical_indicators_batch(self, history: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """Add technical indicator columns to many symbols' frames in one vectorized pass"""
+        frames = {symbol: df for symbol, df in history.items() if not df.empty}
+        if not frames:
+            return history
+
+        indicators = compute_indicators(*build_close_matrix(frames))
+        for symbol, df in frames.items():
+            for name, values in indicators.for_symbol(symbol).items():
+                df[name] = values
+        return history
+
+    def get_latest_indicators(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Return a symbol's latest indicators from streaming state, kept in line with QuestDB.
+
+        Another process (a standalone scheduler) may have written bars since, so the state is checked
+        against the symbol's watermark: newer or rewritten bars are replayed, and a state that still
+        disagrees is rebuilt from the full history.
+        """
+        if self.indicator_state is None:
+            self.indicator_state = IndicatorStateStore()
+
+        state = self.indicator_state.get(symbol)
+        marks = self.loader.get_watermarks([symbol]).get(symbol)
+        if state is not None and marks is not None and not state.matches(*marks[:3]):
+            since = self.loader.load_history([symbol], start=state.last_timestamp.to_pydatetime())
+            if symbol in since:
+                self.indicator_state.update_frame(
+                    symbol, since[symbol].set_index('timestamp'), close_column='close', create=False
+                )
+            if not state.matches(*marks[:3]):
+                self.indicator_state.reset(symbol)
+
+        if self.indicator_state.get(symbol) is None:
+            history = self.loader.load_history([symbol])
+            if symbol not in history:
+                return None
+            self.indicator_state.bootstrap(history)
+        return self.indicator_state.get(symbol).indicators()
+
+    def calculate_features(self, df: pd.DataFrame, sentiment_score: float = 0.0) -> Dict[str, float]:
+        """Latest feature row of a frame with indicators computed (the pandas counterpart of SqlFeatureProvider)"""
+        last = df.iloc[-1]
+        features = {name: float(last[name]) for name in BAR_FEATURES}
+        enough = len(df) >= VOLUME_WINDOW
+        avg_volume = float(df['volume'].iloc[-VOLUME_WINDOW:].mean()) if enough else np.nan
+        features['avg_volume_20'] = avg_volume
+        features['volume_ratio'] = features['volume'] / avg_volume if enough and avg_volume else np.nan
+        features['sentiment'] = sentiment_score
+        return {name: features[name] for name in FEATURE_NAMES}
+
+    def load_features(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """Latest indicator, volume and sentiment features per symbol, from QuestDB or from loaded history"""
+        if self.sql_features is not None:
+            return self.sql_features.load_features(symbols)
+
+        if symbols is None:
+            symbols = self.loader.get_symbols()
+        get_frame, sentiment = self.load_batch(symbols)
+        features = {}
+        for symbol in symbols:
+            frame = get_frame(symbol)
+            if frame is not None and not frame.empty:
+                features[symbol] = self.calculate_features(frame, sentiment.get(symbol, 0.0))
+        return features
+
     def analyze_news_sentiment(self, news_items: List[Dict]) -> float:
-        sentiments = []
-        for item in news_items:
-            blob = TextBlob(item['title'] + ' ' + item['description'])
-            sentiments.append(blob.sentiment.polarity)
-        return np.mean(sentiments) if sentiments else 0
+        """Mean polarity of ad-hoc news items; stored news is scored at ingest instead"""
+        sentiments = self.sentiment.score_batch(news_items)
+        return float(np.mean(sentiments)) if sentiments else 0
+
+    def load_data(self, symbols: Optional[List[str]] = None) -> Tuple[Dict, Dict]:
+        """Bulk load history frames and aggregated news sentiment for the given symbols, keyed by symbol"""
+        start = None
+        if self.history_days:
+            start = datetime.utcnow() - timedelta(days=self.history_days)
+        with metrics.stage('db_fetch_history'):
+            history = self.loader.load_history(symbols, start=start)
+        metrics.inc('rows_fetched_total', sum(len(df) for df in history.values()), source='stock_historical_data')
+        with metrics.stage('db_fetch_sentiment'):
+            sentiment = self.loader.load_sentiment(symbols, half_life_days=self.sentiment_half_life_days)
+        return history, sentiment
+
+    def load_universe(self, symbols: Optional[List[str]] = None) -> Tuple[UniverseStore, Dict]:
+        """Bulk load history into a UniverseStore with indicators computed, plus aggregated sentiment"""
+        start = None
+        if self.history_days:
+            start = datetime.utcnow() - timedelta(days=self.history_days)
+        dtype = self.universe_dtype or 'float64'
+        with metrics.stage('db_fetch_history'):
+            if hasattr(self.loader, 'load_universe'):
+                universe = self.loader.load_universe(symbols, start=start, dtype=dtype)
+            else:
+                universe = UniverseStore.from_frames(self.loader.load_history(symbols, start=start), dtype)
+        metrics.inc('rows_fetched_total', len(universe.timestamps), source='stock_historical_data')
+        with metrics.stage('db_fetch_sentiment'):
+            sentiment = self.loader.load_sentiment(symbols, half_life_days=self.sentiment_half_life_days)
+        with metrics.stage('indicators'):
+            universe.compute_indicators()
+        return universe, sentiment
+
+    def load_batch(self, symbols: List[str]) -> Tuple[Callable[[str], Optional[pd.DataFrame]], Dict]:
+        """Load symbols with indicators computed; returns a per-symbol frame getter and sentiment scores"""
+        if self.universe_dtype:
+            universe, sentiment = self.load_universe(symbols)
+            # Frames are built one at a time and dropped after analysis
+            return (lambda symbol: universe.frame(symbol) if symbol in universe else None), sentiment
+
+        history, sentiment = self.load_data(symbols)
+        history = self.calculate_technical_indicators_batch(history)
+        return history.get, sentiment
 
     def predict_stock_performance(self, symbol: str) -> Dict:
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT * FROM stock_historical_data WHERE symbol = %s", (symbol,))
-            columns = ['timestamp', 'symbol', 'open', 'high', 'low', 'close', 'volume']
-            hist_data = pd.DataFrame(cursor.fetchall(), columns=columns)
-            cursor.close()
-            
-            if hist_data.empty:
+            history, sentiment = self.load_data([symbol])
+        except Exception as e:
+            self.logger.error(f"Error loading data for {symbol}: {e}")
+            return None
+        return self.analyze_frame(symbol, history.get(symbol), sentiment.get(symbol, 0.0))
+
+    def analyze_frame(self, symbol: str, hist_data: Optional[pd.DataFrame],
+                      sentiment_score: float = 0.0, indicators_ready: bool = False) -> Dict:
+        """Analyze one symbol from an already loaded history frame and its aggregated sentiment"""
+        try:
+            if hist_data is None or hist_data.empty:
+                metrics.inc('symbols_analyzed_total', result='no_data')
                 return None
                 
-            hist_data = self.calculate_technical_indicators(hist_data)
-            
-            # Fetch and analyze news
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT * FROM stock_news WHERE symbol = %s", (symbol,))
-            news_columns = ['timestamp', 'symbol', 'title', 'description', 'source', 'sentiment']
-            news_data = pd.DataFrame(cursor.fetchall(), columns=news_columns)
-            cursor.close()
+            if not indicators_ready:
+                hist_data = self.calculate_technical_indicators(hist_data)
             
-            sentiment_score = self.analyze_news_sentiment(news_data.to_dict('records'))
+            # Sentiment is a constant column, so the fit depends only on the bars
+            watermark = bar_watermark(hist_data)
+            key = ModelRegistry.make_key(symbol, watermark, FEATURES + ['Sentiment'], MODEL_PARAMS)
+            entry = self.model_registry.get_or_fit(
+                key, lambda: self.fit_model(hist_data, sentiment_score)
+            )
+            prediction = entry['prediction']
             
-            # Prepare features
-            features = [
-                'SMA_20', 'SMA_50', 'SMA_200', 'RSI', 'MACD', 'Signal_Line',
-                'Volatility', 'volume'
-            ]
-            X = hist_data[features].fillna(0)
-            X['Sentiment'] = sentiment_score
-            X = self.scaler.fit_transform(X)
-            
-            # Train model
-            y = hist_data['close'].pct_change().shift(-1).fillna(0)
-            model = RandomForestRegressor(n_estimators=100, random_state=42)
-            model.fit(X[:-1], y[:-1])
-            
-            # Make prediction
-            prediction = model.predict(X[-1:])
-            
-            return {
-                'symbol': symbol,
-                'predicted_return': float(prediction[0]),
-                'technical_score': self.calculate_technical_score(hist_data),
-                'sentiment_score': sentiment_score,
-                'overall_score': self.calculate_overall_score(prediction[0], sentiment_score)
-            }
+            metrics.inc('symbols_analyzed_total', result='ok')
+            return self.build_result(symbol, hist_data, prediction, sentiment_score)
             
+        except TimeoutError as e:
+            # A pool worker's per-symbol alarm firing during the fit
+            metrics.inc('symbols_analyzed_total', result='timeout')
+            self.logger.error(f"Timed out analyzing {symbol}: {e}")
+            return None
         except Exception as e:
+            metrics.inc('symbols_analyzed_total', result='failed')
             self.logger.error(f"Error analyzing {symbol}: {e}")
             return None
 
+    def build_result(self, symbol: str, hist_data: pd.DataFrame, prediction: float, sentiment_score: float) -> Dict:
+        """Scores plus the latest features (None where there are too few bars), so results can be screened"""
+        result = {
+            'symbol': symbol,
+            'predicted_return': prediction,
+            'technical_score': self.calculate_technical_score(hist_data),
+            'sentiment_score': sentiment_score,
+            'overall_score': self.calculate_overall_score(prediction, sentiment_score)
+        }
+        features = self.calculate_features(hist_data, sentiment_score)
+        result.update(
+            (name, None if value != value else value)
+            for name, value in features.items() if name != 'sentiment'
+        )
+        return result
+
+    def fit_model(self, hist_data: pd.DataFrame, sentiment_score: float) -> Dict:
+        """Fit a per-symbol scaler and forest and predict the next return"""
+        # sklearn takes seconds to import, so it loads on the first fit rather than with the API
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.preprocessing import StandardScaler
+
+        # Prepare features
+        X = hist_data[FEATURES].fillna(0)
+        X['Sentiment'] = sentiment_score
+        scaler = StandardScaler()
+        with metrics.stage('scaler_fit'):
+            X = scaler.fit_transform(X)
+        
+        # Train model
+        y = hist_data['close'].pct_change().shift(-1).fillna(0)
+        model = RandomForestRegressor(**MODEL_PARAMS)
+        with metrics.stage('model_fit'):
+            model.fit(X[:-1], y[:-1])
+        
+        # Make prediction
+        with metrics.stage('model_predict'):
+            prediction = model.predict(X[-1:])
+        return {'scaler': scaler, 'model': model, 'prediction': float(prediction[0])}
+
     def calculate_technical_score(self, df: pd.DataFrame) -> float:
         scores = []
         
         # Trend following indicators
-        if df['SMA_20'].iloc[-1] > df['SMA_50'].iloc[-1]:
-            scores.append(1)
-        if df['SMA_50'].iloc[-1] > df['SMA_200'].iloc[-1]:
-            scores.append(1)
+        scores.append(1 if df['SMA_20'].iloc[-1] > df['SMA_50'].iloc[-1] else 0)
+        scores.append(1 if df['SMA_50'].iloc[-1] > df['SMA_200'].iloc[-1] else 0)
             
         # RSI
         rsi = df['RSI'].iloc[-1]
-        if 30 <= rsi <= 70:
-            scores.append(1)
+        scores.append(1 if 30 <= rsi <= 70 else 0)
             
         # MACD
-        if df['MACD'].iloc[-1] > df['Signal_Line'].iloc[-1]:
-            scores.append(1)
+        scores.append(1 if df['MACD'].iloc[-1] > df['Signal_Line'].iloc[-1] else 0)
             
         return sum(scores) / len(scores)
 
@@ -141,22 +378,172 @@ class StockAnalyzer:
             weights['risk'] * risk_score
         )
 
+    def get_data_watermarks(self) -> Dict[str, Tuple]:
+        """Return the latest bar (timestamp, row count, close, volume) and news marks per symbol"""
+        return self.loader.get_watermarks()
+
+    def analyze_symbols(self, symbols: List[str]) -> List[Dict]:
+        """Run predict_stock_performance for each symbol, skipping failures"""
+        if self.prediction_mode == 'pooled':
+            return self.analyze_symbols_pooled(symbols)
+        if self.workers > 1 and len(symbols) > 1:
+            return self.analyze_symbols_parallel(symbols)
+
+        try:
+            get_frame, sentiment = self.load_batch(symbols)
+        except Exception as e:
+            self.logger.error(f"Error loading data for {len(symbols)} symbols: {e}")
+            return []
+
+        results = []
+        for symbol in symbols:
+            analysis = self.analyze_frame(
+                symbol, get_frame(symbol), sentiment.get(symbol, 0.0), indicators_ready=True
+            )
+            if analysis:
+                results.append(analysis)
+        return results
+
+    @staticmethod
+    def normalize_features(hist_data: pd.DataFrame, sentiment_score: float) -> np.ndarray:
+        """Scale-free features so rows from different symbols are comparable"""
+        close = hist_data['close'].to_numpy(dtype=np.float64)
+        volume = hist_data['volume'].to_numpy(dtype=np.float64)
+        columns = [hist_data[name].to_numpy(dtype=np.float64) / close for name in PRICE_FEATURES]
+        columns.append(hist_data['RSI'].to_numpy(dtype=np.float64) / 100)
+        mean_volume = volume.mean()
+        columns.append(volume / mean_volume if mean_volume else np.zeros_like(volume))
+        columns.append(np.full_like(close, sentiment_score))
+        return np.nan_to_num(np.column_stack(columns), nan=0.0, posinf=0.0, neginf=0.0)
+
+    def analyze_symbols_pooled(self, symbols: List[str]) -> List[Dict]:
+        """Train one model on every symbol's stacked history and score all latest rows in one call"""
+        try:
+            history, sentiment = self.load_data(symbols)
+        except Exception as e:
+            self.logger.error(f"Error loading data for {len(symbols)} symbols: {e}")
+            return []
+
+        history = self.calculate_technical_indicators_batch(history)
+        train_X, train_y, latest_X, prepared = [], [], [], []
+        for symbol in symbols:
+            hist_data = history.get(symbol)
+            if hist_data is None or len(hist_data) < 2:
+                continue
+            try:
+                sentiment_score = sentiment.get(symbol, 0.0)
+                X = self.normalize_features(hist_data, sentiment_score)
+                y = hist_data['close'].pct_change().shift(-1).fillna(0).to_numpy()
+                train_X.append(X[:-1])
+                train_y.append(y[:-1])
+                latest_X.append(X[-1])
+                prepared.append((symbol, hist_data, sentiment_score))
+            except Exception as e:
+                self.logger.error(f"Error preparing features for {symbol}: {e}")
+
+        if not prepared:
+            return []
+
+        # One model per universe state: every symbol's watermark plus its sentiment
+        digest = hashlib.sha1(repr([
+            (symbol, tuple(str(mark) for mark in bar_watermark(hist_data)), sentiment_score)
+            for symbol, hist_data, sentiment_score in prepared
+        ]).encode()).hexdigest()
+        params = dict(MODEL_PARAMS, n_jobs=self.model_jobs)
+        key = ModelRegistry.make_key('__pooled__', (digest,), FEATURES + ['Sentiment'], params)
+
+        def fit() -> Dict:
+            from sklearn.ensemble import RandomForestRegressor
+
+            model = RandomForestRegressor(**params)
+            with metrics.stage('model_fit'):
+                model.fit(np.vstack(train_X), np.concatenate(train_y))
+            with metrics.stage('model_predict'):
+                predictions = model.predict(np.vstack(latest_X))
+            return {'model': model, 'prediction': predictions.astype(float).tolist()}
+
+        try:
+            predictions = self.model_registry.get_or_fit(key, fit)['prediction']
+        except Exception as e:
+            self.logger.error(f"Error fitting pooled model: {e}")
+            return []
+
+        results = []
+        for (symbol, hist_data, sentiment_score), prediction in zip(prepared, predictions):
+            try:
+                metrics.inc('symbols_analyzed_total', result='ok')
+                results.append(self.build_result(symbol, hist_data, prediction, sentiment_score))
+            except Exception as e:
+                self.logger.error(f"Error analyzing {symbol}: {e}")
+        return results
+
+    def worker_config(self) -> Dict:
+        """Constructor arguments for the analyzer each pool worker builds"""
+        return {
+            'db_host': self.db_host,
+            'db_port': self.db_port,
+            'history_days': self.history_days,
+            'http_url': self.http_url,
+            'sentiment_half_life_days': self.sentiment_half_life_days,
+            'history_cache_dir': self.history_cache.path if self.history_cache else None,
+            'universe_dtype': self.universe_dtype,
+            'model_cache_size': self.model_registry.max_entries,
+            'model_cache_dir': self.model_registry.cache_dir
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawn rather than fork: the parent holds a DB connection and server threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.worker_config(),)
+            )
+        return self._executor
+
+    def analyze_symbols_parallel(self, symbols: List[str]) -> List[Dict]:
+        """Fan symbol analysis out across worker processes in chunks"""
+        chunks = [
+            symbols[i:i + self.chunk_size]
+            for i in range(0, len(symbols), self.chunk_size)
+        ]
+        executor = self._get_executor()
+        futures = {
+            executor.submit(_analyze_chunk, chunk, self.symbol_timeout): chunk
+            for chunk in chunks
+        }
+
+        results = []
+        for future in as_completed(futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                self.logger.error(f"Error analyzing batch {futures[future]}: {e}")
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died; drop the pool so the next call starts fresh ones
+                    self.close()
+                    break
+        return results
+
+    def close(self):
+        """Shut down the worker pool, if one was started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @staticmethod
+    def rank(results: List[Dict]) -> List[Dict]:
+        """Sort analysis results by overall score, best first"""
+        return sorted(results, key=lambda x: x['overall_score'], reverse=True)
+
     def get_top_stocks(self, n: int = 10) -> List[Dict]:
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT DISTINCT symbol FROM stock_historical_data")
-            symbols = [row[0] for row in cursor.fetchall()]
-            cursor.close()
-            
-            results = []
-            for symbol in symbols:
-                analysis = self.predict_stock_performance(symbol)
-                if analysis:
-                    results.append(analysis)
+            symbols = self.loader.get_symbols()
+            results = self.analyze_symbols(symbols)
             
             # Sort by overall score
-            results.sort(key=lambda x: x['overall_score'], reverse=True)
-            return results[:n]
+            return self.rank(results)[:n]
             
         except Exception as e:
             self.logger.error(f"Error getting top stocks: {e}")
@@ -1,29 +1,56 @@
-import yfinance as yf
 import pandas as pd
 import requests
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+import itertools
 import logging
-import time
-import questdb.ingress as qi
-import psycopg2
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db_pool import ConnectionPool
+from src.indicator_state import IndicatorStateStore
+from src.ingestion import BulkIngestor, to_naive_nanos
+from src.market_data import MarketDataSource, YahooFinanceSource, ConcurrentFetcher
+from src.sentiment import SentimentScorer
+from src.history_cache import HistoryCache
+from src.metrics import metrics
 
 class StockDataCollector:
-    def __init__(self, db_host: str = 'questdb', db_port: int = 8812):
+    def __init__(self, db_host: str = 'questdb', db_port: int = 8812,
+                 indicator_state: Optional[IndicatorStateStore] = None,
+                 ilp_port: int = 9009, ingestion_mode: str = 'ilp', batch_rows: int = 10000,
+                 source: Optional[MarketDataSource] = None, fetch_workers: int = 4,
+                 fetch_batch_size: int = 20, fetch_rate: float = 2.0,
+                 pool: Optional[ConnectionPool] = None,
+                 sentiment: Optional[SentimentScorer] = None,
+                 history_cache: Optional[HistoryCache] = None,
+                 symbols: Optional[List[str]] = None, wal_visibility_timeout: float = 30.0):
         self.logger = logging.getLogger(__name__)
         self.db_host = db_host
         self.db_port = db_port
-        self.conn = psycopg2.connect(
-            dbname='qdb',
-            user='admin',
-            password='quest',
-            host=db_host,
-            port=db_port
+        self.indicator_state = indicator_state
+        self.sentiment = sentiment or SentimentScorer()
+        self.history_cache = history_cache
+        self.symbols = symbols
+        # Seconds to wait for ingested bars to become queryable before a run reports completion
+        self.wal_visibility_timeout = wal_visibility_timeout
+        self.fetcher = ConcurrentFetcher(
+            source or YahooFinanceSource(),
+            max_workers=fetch_workers,
+            batch_size=fetch_batch_size,
+            rate=fetch_rate
+        )
+        self.pool = pool or ConnectionPool(db_host, db_port)
+        self.ingestor = BulkIngestor(
+            self.pool, host=db_host, ilp_port=ilp_port, mode=ingestion_mode, batch_rows=batch_rows
         )
-        self.conn.autocommit = True
         
     def get_nse_symbols(self) -> List[str]:
-        """Return a list of test symbols for now"""
+        """Return the configured symbols, or a list of test symbols"""
+        if self.symbols:
+            return list(self.symbols)
         return ['RELIANCE.NS', 'TCS.NS', 'INFY.NS', 'HDFCBANK.NS', 'WIPRO.NS']
 
     def fetch_historical_data(self, symbol: str, period: str = "1mo") -> pd.DataFrame:
@@ -31,8 +58,7 @@ class StockDataCollector:
         try:
             # Remove .NS extension for storing in database
             clean_symbol = symbol.replace('.NS', '')
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period=period)
+            hist = self.fetcher.fetch_batch([symbol], period=period).get(symbol, pd.DataFrame())
             hist['Symbol'] = clean_symbol
             self.logger.info(f"Fetched {len(hist)} records for {symbol}")
             return hist
@@ -40,133 +66,209 @@ class StockDataCollector:
             self.logger.error(f"Error fetching historical data for {symbol}: {e}")
             return pd.DataFrame()
 
+    def store_data(self, df: pd.DataFrame, table_name: str) -> bool:
+        """Store data through the configured bulk ingestion path (ILP or INSERT)"""
+        try:
+            stored = self.ingestor.write_history(df, table_name)
+            self.logger.info(f"Stored {stored} records in {table_name}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error storing data in database: {e}")
+            return False
+
     def store_data_postgres(self, df: pd.DataFrame, table_name: str):
         """Store data using PostgreSQL connection"""
         try:
-            cursor = self.conn.cursor()
-            
-            for index, row in df.iterrows():
-                # Convert timestamp to string
-                timestamp = index.strftime('%Y-%m-%d %H:%M:%S')
-                
-                insert_query = f"""
-                INSERT INTO {table_name} 
-                (timestamp, symbol, open, high, low, close, volume)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """
-                
-                cursor.execute(insert_query, (
-                    timestamp,
-                    row['Symbol'],
-                    float(row['Open']),
-                    float(row['High']),
-                    float(row['Low']),
-                    float(row['Close']),
-                    int(row['Volume'])
-                ))
-            
-            self.conn.commit()
-            cursor.close()
-            self.logger.info(f"Stored {len(df)} records in {table_name}")
-            
+            stored = self.ingestor.write_history(df, table_name, mode='pg')
+            self.logger.info(f"Stored {stored} records in {table_name}")
         except Exception as e:
             self.logger.error(f"Error storing data in database: {e}")
 
     def generate_sample_news(self, symbol: str) -> List[Dict]:
         """Generate sample news data"""
         news_templates = [
-            {"title": f"{symbol} reports strong quarterly results", "sentiment": 0.8},
-            {"title": f"{symbol} announces expansion plans", "sentiment": 0.6},
-            {"title": f"{symbol} faces market challenges", "sentiment": -0.4},
-            {"title": f"New opportunities for {symbol}", "sentiment": 0.5}
+            {"title": f"{symbol} reports strong quarterly results"},
+            {"title": f"{symbol} announces expansion plans"},
+            {"title": f"{symbol} faces market challenges"},
+            {"title": f"New opportunities for {symbol}"}
         ]
         return news_templates
 
     def store_news_data(self, symbol: str, news_items: List[Dict]):
         """Store news data in database"""
+        self.store_news_batch({symbol: news_items})
+
+    def store_news_batch(self, news: Dict[str, List[Dict]]):
+        """Score every new headline in one pass and store them all in one write"""
         try:
-            cursor = self.conn.cursor()
-            
-            for item in news_items:
-                insert_query = """
-                INSERT INTO stock_news 
-                (timestamp, symbol, title, description, sentiment)
-                VALUES (%s, %s, %s, %s, %s)
-                """
-                
-                cursor.execute(insert_query, (
-                    datetime.now(),
-                    symbol,
-                    item['title'],
-                    item.get('description', ''),
-                    item.get('sentiment', 0)
-                ))
-            
-            self.conn.commit()
-            cursor.close()
-            self.logger.info(f"Stored {len(news_items)} news items for {symbol}")
+            items = [item for news_items in news.values() for item in news_items]
+            # Polarity is computed once here; the analyzer only aggregates the stored column
+            for item, score in zip(items, self.sentiment.score_batch(items)):
+                item['sentiment'] = score
+            stored = self.ingestor.write_news_batch(news)
+            self.logger.info(f"Stored {stored} news items for {len(news)} symbols")
             
         except Exception as e:
             self.logger.error(f"Error storing news data: {e}")
 
-    def collect_all_data(self):
-        """Main method to collect all required data"""
+    @metrics.timed('history_cache_append')
+    def update_history_cache(self, symbol: str, hist_data: pd.DataFrame, watermark: Optional[pd.Timestamp]):
+        """Append freshly stored bars to the history cache if it is contiguous with QuestDB, else drop it"""
+        try:
+            cached_last = self.history_cache.last_timestamp(symbol)
+            if cached_last is not None and watermark is not None and cached_last >= watermark.value:
+                self.history_cache.append_frame(symbol, hist_data)
+            else:
+                # Missing or behind: appending would leave a gap, so let the next read refill it
+                self.history_cache.drop(symbol)
+        except Exception as e:
+            self.logger.error(f"Error updating history cache for {symbol}: {e}")
+
+    def get_latest_timestamps(self) -> Dict[str, pd.Timestamp]:
+        """Return the latest stored bar timestamp per symbol in one LATEST ON query"""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT symbol, timestamp FROM stock_historical_data LATEST ON timestamp PARTITION BY symbol"
+                )
+                latest = {row[0]: pd.Timestamp(row[1]) for row in cursor.fetchall()}
+                cursor.close()
+            return latest
+        except Exception as e:
+            self.logger.error(f"Error reading latest timestamps, falling back to a full fetch: {e}")
+            return {}
+
+    def plan_sync(self, symbols: List[str], latest: Dict[str, pd.Timestamp],
+                  initial_period: str = "1mo", max_symbols: Optional[int] = None) -> List[Tuple[List[str], Dict]]:
+        """Group symbols by the fetch range they still need, stalest first; up-to-date symbols are skipped"""
+        today = pd.Timestamp(datetime.now()).normalize()
+        pending = []
+        for symbol in symbols:
+            watermark = latest.get(symbol.replace('.NS', ''))
+            if watermark is None:
+                pending.append((pd.Timestamp.min, symbol, ('period', initial_period)))
+                continue
+            # Today's bar is refetched until the day is over; dedup keys upsert it
+            start = watermark.normalize() + timedelta(days=1)
+            if watermark.normalize() == today:
+                start = today
+            if start > today:
+                continue
+            pending.append((watermark, symbol, ('start', start)))
+
+        # Never-collected symbols, then the oldest watermarks, so a capped run does the stalest work
+        pending.sort(key=lambda item: item[0])
+        if max_symbols is not None:
+            pending = pending[:max_symbols]
+        groups: Dict[Tuple, List[str]] = {}
+        for _, symbol, key in pending:
+            groups.setdefault(key, []).append(symbol)
+
+        return [
+            (group, {'period': value} if kind == 'period' else {'start': value.to_pydatetime()})
+            for (kind, value), group in groups.items()
+        ]
+
+    @metrics.timed('collection_run')
+    def collect_all_data(self, full_refresh: bool = False, max_symbols: Optional[int] = None) -> Dict:
+        """Main method to collect all required data; only bars newer than the stored ones are fetched"""
+        summary = {'planned': 0, 'updated': 0, 'error': None}
         try:
             # Create tables if they don't exist
-            cursor = self.conn.cursor()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
             
-            # Create stock_historical_data table
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stock_historical_data (
-                timestamp TIMESTAMP,
-                symbol STRING,
-                open DOUBLE,
-                high DOUBLE,
-                low DOUBLE,
-                close DOUBLE,
-                volume LONG
-            );
-            """)
+                # Create stock_historical_data table; re-ingested bars upsert instead of duplicating
+                cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stock_historical_data (
+                    timestamp TIMESTAMP,
+                    symbol SYMBOL,
+                    open DOUBLE,
+                    high DOUBLE,
+                    low DOUBLE,
+                    close DOUBLE,
+                    volume LONG
+                ) timestamp(timestamp) PARTITION BY DAY WAL
+                DEDUP UPSERT KEYS(timestamp, symbol);
+                """)
             
-            # Create stock_news table
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stock_news (
-                timestamp TIMESTAMP,
-                symbol STRING,
-                title STRING,
-                description STRING,
-                sentiment DOUBLE
-            );
-            """)
+                # Create stock_news table
+                cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stock_news (
+                    timestamp TIMESTAMP,
+                    symbol SYMBOL,
+                    title STRING,
+                    description STRING,
+                    source STRING,
+                    sentiment DOUBLE
+                ) timestamp(timestamp) PARTITION BY DAY;
+                """)
             
-            self.conn.commit()
-            cursor.close()
+                cursor.close()
             
             symbols = self.get_nse_symbols()
-            self.logger.info(f"Starting data collection for {len(symbols)} symbols")
+            with metrics.stage('sync_plan'):
+                latest = {} if full_refresh else self.get_latest_timestamps()
+                plan = self.plan_sync(symbols, latest, max_symbols=max_symbols)
+            today = pd.Timestamp(datetime.now()).normalize()
+            summary['planned'] = sum(len(group) for group, _ in plan)
+            self.logger.info(f"Starting data collection for {summary['planned']}/{len(symbols)} symbols")
             
-            for symbol in symbols:
+            # Fetch threads keep downloading while this loop ingests finished symbols
+            fetched = itertools.chain.from_iterable(
+                self.fetcher.iter_history(group, **kwargs) for group, kwargs in plan
+            )
+            news: Dict[str, List[Dict]] = {}
+            for symbol, hist_data in fetched:
                 self.logger.info(f"Processing {symbol}")
+                clean_symbol = symbol.replace('.NS', '')
+                
+                # Keep only bars newer than what is already stored, plus today's still-moving bar
+                watermark = latest.get(clean_symbol)
+                if watermark is not None and not hist_data.empty:
+                    stamps = to_naive_nanos(hist_data.index)
+                    if watermark.normalize() == today:
+                        hist_data = hist_data[stamps >= watermark.value].copy()
+                    else:
+                        hist_data = hist_data[stamps > watermark.value].copy()
                 
-                # Fetch and store historical data
-                hist_data = self.fetch_historical_data(symbol)
+                # Store historical data
                 if not hist_data.empty:
-                    self.store_data_postgres(hist_data, 'stock_historical_data')
+                    hist_data['Symbol'] = clean_symbol
+                    stored = self.store_data(hist_data, 'stock_historical_data')
+                    summary['updated'] += int(stored)
+                    if stored and self.history_cache is not None:
+                        self.update_history_cache(clean_symbol, hist_data, watermark)
+                    if self.indicator_state is not None:
+                        # Only extend existing states; new ones are replayed from stored history on first read
+                        with metrics.stage('indicator_state_update'):
+                            self.indicator_state.update_frame(clean_symbol, hist_data, create=False)
+                metrics.inc('symbols_collected_total', result='updated' if not hist_data.empty else 'unchanged')
                 
-                # Generate and store sample news
-                news_data = self.generate_sample_news(symbol.replace('.NS', ''))
+                # Generate sample news; it is scored and stored for all symbols at once
+                news_data = self.generate_sample_news(clean_symbol)
                 if news_data:
-                    self.store_news_data(symbol.replace('.NS', ''), news_data)
-                
-                time.sleep(1)  # Avoid rate limiting
+                    news[clean_symbol] = news_data
                 
+            if news:
+                self.store_news_batch(news)
+            if self.indicator_state is not None:
+                self.indicator_state.save()
+            if summary['updated']:
+                # WAL commits apply asynchronously; wait so a ranking refresh right after sees the new bars
+                with metrics.stage('wal_visibility'):
+                    summary['visible'] = self.ingestor.wait_for_wal(
+                        ['stock_historical_data'], timeout=self.wal_visibility_timeout
+                    )
             self.logger.info("Data collection completed successfully")
             
         except Exception as e:
             self.logger.error(f"Error in data collection: {e}")
+            summary['error'] = str(e)
         finally:
-            if self.conn:
-                self.conn.close()
+            self.ingestor.close()
+        return summary
 
 if __name__ == "__main__":
     # Set up logging
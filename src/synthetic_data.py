@@ -0,0 +1,139 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import HISTORY_COLUMNS, NEWS_COLUMNS
+
+HEADLINES = [
+    "{symbol} reports strong quarterly results",
+    "{symbol} announces expansion plans",
+    "{symbol} faces market challenges",
+    "New opportunities for {symbol}",
+    "{symbol} misses earnings estimates",
+    "Analysts upgrade {symbol} after record sales",
+    "{symbol} shares slump on weak guidance",
+    "{symbol} wins a major contract"
+]
+
+
+def generate_history(symbols: int = 50, days: int = 500, seed: int = 42,
+                     end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+    """Random-walk daily OHLCV bars per symbol, shaped like BulkDataLoader.load_history output"""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end or datetime.now()).normalize()
+    stamps = pd.bdate_range(end=end, periods=days)
+    history = {}
+    for i in range(symbols):
+        symbol = f"SYN{i:04d}"
+        close = 100 * np.cumprod(1 + rng.normal(0.0003, 0.015, days))
+        spread = np.abs(rng.normal(0, 0.01, days))
+        open_ = close * (1 + rng.normal(0, 0.005, days))
+        history[symbol] = pd.DataFrame({
+            'timestamp': stamps,
+            'symbol': symbol,
+            'open': open_,
+            'high': np.maximum(open_, close) * (1 + spread),
+            'low': np.minimum(open_, close) * (1 - spread),
+            'close': close,
+            'volume': rng.integers(100_000, 5_000_000, days)
+        }, columns=HISTORY_COLUMNS)
+    return history
+
+
+def generate_news(history: Dict[str, pd.DataFrame], per_symbol: int = 20,
+                  seed: int = 42) -> Dict[str, pd.DataFrame]:
+    """Headlines with pre-scored polarity spread over each symbol's bar dates, shaped like load_news output"""
+    rng = np.random.default_rng(seed)
+    news = {}
+    for symbol, bars in history.items():
+        stamps = np.sort(rng.choice(bars['timestamp'].to_numpy(), size=per_symbol))
+        titles = [HEADLINES[j].format(symbol=symbol) for j in rng.integers(0, len(HEADLINES), per_symbol)]
+        news[symbol] = pd.DataFrame({
+            'timestamp': pd.to_datetime(stamps) + timedelta(hours=10),
+            'symbol': symbol,
+            'title': titles,
+            'description': '',
+            'sentiment': rng.uniform(-1, 1, per_symbol)
+        }, columns=NEWS_COLUMNS)
+    return news
+
+
+def to_yfinance_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Convert a loader-shaped history frame into the yfinance shape the collector stores"""
+    return pd.DataFrame({
+        'Symbol': frame['symbol'].to_numpy(),
+        'Open': frame['open'].to_numpy(),
+        'High': frame['high'].to_numpy(),
+        'Low': frame['low'].to_numpy(),
+        'Close': frame['close'].to_numpy(),
+        'Volume': frame['volume'].to_numpy()
+    }, index=pd.DatetimeIndex(frame['timestamp']))
+
+
+class InMemoryDataLoader:
+    """Stand-in for BulkDataLoader over in-memory frames, so the analyzer runs without QuestDB"""
+
+    def __init__(self, history: Dict[str, pd.DataFrame], news: Optional[Dict[str, pd.DataFrame]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.history = history
+        self.news = news or {}
+
+    @staticmethod
+    def _select(frames: Dict[str, pd.DataFrame], symbols: Optional[List[str]],
+                start: Optional[datetime], end: Optional[datetime]) -> Dict[str, pd.DataFrame]:
+        selected = {}
+        for symbol in (frames if symbols is None else symbols):
+            frame = frames.get(symbol)
+            if frame is None:
+                continue
+            mask = np.ones(len(frame), dtype=bool)
+            if start is not None:
+                mask &= (frame['timestamp'] >= start).to_numpy()
+            if end is not None:
+                mask &= (frame['timestamp'] < end).to_numpy()
+            if mask.any():
+                # Callers add indicator columns in place, as they do to freshly loaded frames
+                selected[symbol] = frame[mask].reset_index(drop=True)
+        return selected
+
+    def load_history(self, symbols: Optional[List[str]] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        return self._select(self.history, symbols, start, end)
+
+    def load_news(self, symbols: Optional[List[str]] = None, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        return self._select(self.news, symbols, start, end)
+
+    def load_sentiment(self, symbols: Optional[List[str]] = None, half_life_days: Optional[float] = None,
+                       start: Optional[datetime] = None) -> Dict[str, float]:
+        now = datetime.now()
+        scores = {}
+        for symbol, frame in self._select(self.news, symbols, start, None).items():
+            frame = frame.dropna(subset=['sentiment'])
+            if frame.empty:
+                continue
+            values = frame['sentiment'].to_numpy(dtype=np.float64)
+            if half_life_days:
+                ages = (now - frame['timestamp']).dt.total_seconds().to_numpy() / (half_life_days * 86400)
+                weights = np.power(0.5, ages)
+                scores[symbol] = float((weights * values).sum() / weights.sum())
+            else:
+                scores[symbol] = float(values.mean())
+        return scores
+
+    def get_symbols(self) -> List[str]:
+        return list(self.history)
+
+    def get_watermarks(self, symbols: Optional[List[str]] = None) -> Dict[str, Tuple]:
+        marks = {}
+        for symbol, frame in self.history.items():
+            if symbols is not None and symbol not in symbols:
+                continue
+            news = self.news.get(symbol)
+            news_marks = (None, 0) if news is None or news.empty else (news['timestamp'].iloc[-1], len(news))
+            last = frame.iloc[-1]
+            marks[symbol] = (last['timestamp'], len(frame), last['close'], last['volume']) + news_marks
+        return marks
@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.indicator_engine import INDICATOR_NAMES, compute_indicators
+from src.ingestion import to_naive_nanos
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+
+class UniverseStore:
+    """History of many symbols in contiguous column arrays, one slice per symbol.
+
+    Rows are grouped by symbol, so the symbol column is dictionary-encoded down to the symbols list plus
+    an offsets array (symbol i owns rows offsets[i]:offsets[i + 1]). Timestamps are int64 epoch
+    nanoseconds; prices and indicators use the store's dtype (float32 halves them), volume stays int64.
+
+    The dtype only governs what is held between steps. Indicators are computed from a float64 close
+    matrix, and analysis reads one symbol at a time through frame(), a float64 copy of its slice.
+    """
+
+    def __init__(self, symbols: List[str], offsets: np.ndarray, timestamps: np.ndarray,
+                 columns: Dict[str, np.ndarray], dtype=np.float64):
+        self.symbols = symbols
+        self.offsets = offsets
+        self.timestamps = timestamps
+        self.columns = columns
+        self.dtype = np.dtype(dtype)
+        self.indicators: Dict[str, np.ndarray] = {}
+        self._codes = {symbol: i for i, symbol in enumerate(symbols)}
+
+    @classmethod
+    def from_columns(cls, per_symbol: Dict[str, Dict[str, np.ndarray]], dtype=np.float64) -> 'UniverseStore':
+        """Build from {symbol: {timestamp (epoch ns), open, high, low, close, volume}} arrays"""
+        dtype = np.dtype(dtype)
+        symbols = [symbol for symbol, columns in per_symbol.items() if len(columns['timestamp'])]
+        lengths = [len(per_symbol[symbol]['timestamp']) for symbol in symbols]
+        offsets = np.zeros(len(symbols) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        def stack(name: str, column_dtype) -> np.ndarray:
+            out = np.empty(offsets[-1], dtype=column_dtype)
+            for i, symbol in enumerate(symbols):
+                out[offsets[i]:offsets[i + 1]] = per_symbol[symbol][name]
+            return out
+
+        columns = {name: stack(name, dtype) for name in PRICE_COLUMNS}
+        columns['volume'] = stack('volume', np.int64)
+        return cls(symbols, offsets, stack('timestamp', np.int64), columns, dtype)
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], dtype=np.float64) -> 'UniverseStore':
+        """Build from loader-shaped per-symbol frames"""
+        return cls.from_columns({
+            symbol: dict(
+                {name: frame[name].to_numpy() for name in PRICE_COLUMNS + ['volume']},
+                timestamp=to_naive_nanos(frame['timestamp'])
+            )
+            for symbol, frame in frames.items()
+        }, dtype)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, dtype=np.float64) -> 'UniverseStore':
+        """Build from one query result ordered by symbol, timestamp, without splitting it into frames"""
+        dtype = np.dtype(dtype)
+        symbol_values = frame['symbol'].to_numpy()
+        if len(symbol_values) == 0:
+            empty = {name: np.empty(0, dtype=dtype) for name in PRICE_COLUMNS}
+            empty['volume'] = np.empty(0, dtype=np.int64)
+            return cls([], np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int64), empty, dtype)
+
+        starts = np.flatnonzero(np.r_[True, symbol_values[1:] != symbol_values[:-1]])
+        offsets = np.r_[starts, len(symbol_values)].astype(np.int64)
+        columns = {name: frame[name].to_numpy(dtype=dtype) for name in PRICE_COLUMNS}
+        columns['volume'] = frame['volume'].to_numpy(dtype=np.int64)
+        return cls(
+            [str(symbol_values[i]) for i in starts], offsets,
+            to_naive_nanos(frame['timestamp']), columns, dtype
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._codes
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def bounds(self, symbol: str) -> Tuple[int, int]:
+        i = self._codes[symbol]
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def view(self, symbol: str) -> Dict[str, np.ndarray]:
+        """Zero-copy views of one symbol's columns and indicators"""
+        lo, hi = self.bounds(symbol)
+        views = {'timestamp': self.timestamps[lo:hi]}
+        views.update((name, values[lo:hi]) for name, values in self.columns.items())
+        views.update((name, values[lo:hi]) for name, values in self.indicators.items())
+        return views
+
+    def latest(self, name: str) -> np.ndarray:
+        """Each symbol's last value of a column or indicator"""
+        values = self.indicators.get(name)
+        if values is None:
+            values = self.columns[name]
+        return values[self.offsets[1:] - 1]
+
+    def close_matrix(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Right-aligned, NaN-padded float64 (symbols x days) close matrix for the indicator engine"""
+        lengths = self.lengths
+        width = int(lengths.max()) if len(lengths) else 0
+        close = np.full((len(self.symbols), width), np.nan)
+        for i in range(len(self.symbols)):
+            close[i, width - lengths[i]:] = self.columns['close'][self.offsets[i]:self.offsets[i + 1]]
+        return self.symbols, lengths, close
+
+    def compute_indicators(self):
+        """Compute every indicator in one float64 vectorized pass and store them contiguously in the store's dtype"""
+        if not self.symbols:
+            self.indicators = {name: np.empty(0, dtype=self.dtype) for name in INDICATOR_NAMES}
+            return
+        matrix = compute_indicators(*self.close_matrix())
+        width = matrix.arrays[INDICATOR_NAMES[0]].shape[1]
+        # Positions of every real (unpadded) cell, in row-major order, i.e. the store's row order
+        columns = np.arange(width)
+        mask = columns[None, :] >= (width - self.lengths)[:, None]
+        self.indicators = {name: values[mask].astype(self.dtype) for name, values in matrix.arrays.items()}
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """One symbol as a float64 analyzer frame (timestamp, symbol, OHLCV and indicator columns)"""
+        views = self.view(symbol)
+        data = {'timestamp': views.pop('timestamp').view('datetime64[ns]'), 'symbol': symbol}
+        data.update(
+            (name, values if name == 'volume' else values.astype(np.float64))
+            for name, values in views.items()
+        )
+        return pd.DataFrame(data)
+
+    def nbytes(self) -> int:
+        """Bytes held by the arrays (symbol names and offsets included)"""
+        arrays = [self.offsets, self.timestamps] + list(self.columns.values()) + list(self.indicators.values())
+        return sum(values.nbytes for values in arrays) + sum(len(symbol) for symbol in self.symbols)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from src.data_loader import HISTORY_COLUMNS, BulkDataLoader
+
+
+def symbol_ordered_frame(lengths, seed=4):
+    rng = np.random.default_rng(seed)
+    parts = []
+    for i, n in enumerate(lengths):
+        parts.append(pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-01', periods=n, freq='D'),
+            'symbol': f'S{i}',
+            'open': rng.random(n),
+            'high': rng.random(n),
+            'low': rng.random(n),
+            'close': rng.random(n),
+            'volume': rng.integers(0, 10 ** 6, n)
+        }))
+    return pd.concat(parts, ignore_index=True)[HISTORY_COLUMNS]
+
+
+def test_split_by_symbol_shares_memory():
+    """Per-symbol frames hold the same rows as the fetched frame, as views of its column arrays"""
+    frame = symbol_ordered_frame([5, 1, 12])
+    # The pool is only used to fetch, not to split
+    parts = BulkDataLoader(pool=None)._split_by_symbol(frame)
+
+    assert list(parts) == ['S0', 'S1', 'S2']
+    for symbol, part in parts.items():
+        expected = frame[frame['symbol'] == symbol].reset_index(drop=True)
+        pd.testing.assert_frame_equal(part, expected)
+        for column in HISTORY_COLUMNS:
+            assert np.shares_memory(part[column].to_numpy(), frame[column].to_numpy()), column
+
+
+def test_split_empty_frame():
+    assert BulkDataLoader(pool=None)._split_by_symbol(pd.DataFrame(columns=HISTORY_COLUMNS)) == {}
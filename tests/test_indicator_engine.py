@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicator_engine import INDICATOR_NAMES, build_close_matrix, compute_indicators
+from src.stock_analyzer import StockAnalyzer
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    # The pool connects lazily, so no database is needed for the per-frame indicators
+    return StockAnalyzer()
+
+
+def random_frames(lengths, seed=1):
+    rng = np.random.default_rng(seed)
+    return {
+        f'S{i}': pd.DataFrame({'close': 1000 * np.cumprod(1 + rng.normal(0, 0.01, n)), 'volume': np.arange(n)})
+        for i, n in enumerate(lengths)
+    }
+
+
+@pytest.mark.parametrize('lengths', [
+    [300, 30, 5, 1, 250],
+    [200, 199, 201, 14, 15, 26],
+    [1],
+])
+def test_matches_per_frame_indicators(analyzer, lengths):
+    """The NaN-padded matrix path gives the same series as calculate_technical_indicators on each frame"""
+    frames = random_frames(lengths)
+    indicators = compute_indicators(*build_close_matrix(frames))
+
+    for symbol, frame in frames.items():
+        expected = analyzer.calculate_technical_indicators(frame.copy())
+        actual = indicators.for_symbol(symbol)
+        for name in INDICATOR_NAMES:
+            np.testing.assert_allclose(
+                actual[name], expected[name].to_numpy(), rtol=1e-9, atol=1e-9, equal_nan=True,
+                err_msg=f"{symbol} {name}"
+            )
+
+
+def test_flat_series_matches(analyzer):
+    """No losses gives RSI 100 and no movement at all gives NaN, as pandas' division does"""
+    frames = {
+        'UP': pd.DataFrame({'close': np.arange(1.0, 61.0)}),
+        'FLAT': pd.DataFrame({'close': np.full(40, 5.0)})
+    }
+    indicators = compute_indicators(*build_close_matrix(frames))
+
+    for symbol, frame in frames.items():
+        expected = analyzer.calculate_technical_indicators(frame.copy())
+        np.testing.assert_allclose(
+            indicators.for_symbol(symbol)['RSI'], expected['RSI'].to_numpy(), equal_nan=True
+        )
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicator_state import SymbolIndicatorState
+from src.stock_analyzer import StockAnalyzer
+
+STATE_INDICATORS = ['SMA_20', 'SMA_50', 'SMA_200', 'RSI', 'MACD', 'Signal_Line', 'Volatility']
+
+
+@pytest.fixture(scope='module')
+def analyzer():
+    # The pool connects lazily, so no database is needed for the per-frame indicators
+    return StockAnalyzer()
+
+
+def random_frame(n, seed=2):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='D'),
+        'close': 1000 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    })
+
+
+def assert_matches(analyzer, state, frame):
+    expected = analyzer.calculate_technical_indicators(frame.copy()).iloc[-1]
+    actual = state.indicators()
+    for name in STATE_INDICATORS:
+        np.testing.assert_allclose(
+            actual[name], expected[name], rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=name
+        )
+
+
+def test_streaming_matches_per_frame_indicators(analyzer):
+    """Every prefix of a series gives the last row of calculate_technical_indicators"""
+    frame = random_frame(260)
+    state = SymbolIndicatorState()
+
+    for n, (timestamp, close) in enumerate(zip(frame['timestamp'], frame['close']), start=1):
+        assert state.update(timestamp, close)
+        if n in (1, 2, 14, 15, 19, 20, 26, 50, 199, 200, 260):
+            assert_matches(analyzer, state, frame.iloc[:n])
+    assert state.matches(frame['timestamp'].iloc[-1], len(frame), frame['close'].iloc[-1])
+
+
+@pytest.mark.parametrize('n', [1, 2, 30, 210])
+def test_replacing_last_bar_matches(analyzer, n):
+    """A re-collected last bar replaces it in place, as if the series had ended on the new close"""
+    frame = random_frame(n, seed=3)
+    state = SymbolIndicatorState()
+    for timestamp, close in zip(frame['timestamp'], frame['close']):
+        state.update(timestamp, close)
+
+    last = frame['timestamp'].iloc[-1]
+    for close in (frame['close'].iloc[-1] * 1.03, frame['close'].iloc[-1] * 0.95):
+        assert state.update(last, close)
+        frame.loc[frame.index[-1], 'close'] = close
+        assert_matches(analyzer, state, frame)
+
+    assert state.bars == n
+    assert not state.update(last - pd.Timedelta(days=1), 1.0)
+    assert_matches(analyzer, state, frame)